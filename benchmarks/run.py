@@ -0,0 +1,173 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" Measures throughput and latency of fleet sweeps against local stand-in servers
+
+    python -m benchmarks.run --kind node --nodes 1 10 100 --latency 0.02 --schains 500
+"""
+
+import argparse
+from collections import defaultdict
+from time import monotonic
+from typing import Dict, List
+
+from benchmarks.servers import (FakeChain, FakeElasticsearch, FakeWatchdog, WatchdogProfile,
+                                get_node_ip, serve)
+from skale_checks.adapters.connectors import Response
+from skale_checks.adapters.watchdog import ROUTES_CACHE
+from skale_checks.checks.fleet import FleetChecks
+from skale_checks.checks.node import NodeChecks
+from skale_checks.checks.watchdog import WatchdogChecks
+from skale_checks.metrics import (CHECK_DURATION, CHECK_RETRIES, QUEUE_WAIT, REQUEST_DURATION,
+                                  MetricsSink, PrometheusMetrics, get_metrics, set_metrics)
+
+Timings = Dict[str, List[float]]
+
+
+class TimingsMetrics(MetricsSink):
+    """ Keeps raw timings reported by the checks to compute exact percentiles """
+    enabled = True
+
+    def __init__(self):
+        self.routes: Timings = defaultdict(list)
+        self.route_errors: Dict[str, int] = defaultdict(int)
+        self.checks: Timings = defaultdict(list)
+        self.check_retries: Dict[str, int] = defaultdict(int)
+        self.queue_wait: List[float] = []
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if name == REQUEST_DURATION:
+            self.routes[labels['path']].append(value)
+            if labels['status'] != Response.OK_STATUS:
+                self.route_errors[labels['path']] += 1
+        elif name == CHECK_DURATION:
+            self.checks[labels['check']].append(value)
+        elif name == QUEUE_WAIT:
+            self.queue_wait.append(value)
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        if name == CHECK_RETRIES:
+            self.check_retries[labels['check']] += value
+
+
+def get_percentile(values: List[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * percentile / 100), len(values) - 1)]
+
+
+def run(fleet_checks: FleetChecks, header_checks: Dict[str, str], rounds: int,
+        keep_cache: bool, retries: int, finish_timings: Timings) -> List[float]:
+    sweeps = []
+    for _ in range(rounds):
+        if not keep_cache:
+            ROUTES_CACHE.invalidate()
+        started_at = monotonic()
+        finished = set()
+        for node, header, _ in fleet_checks.iter_results(retries=retries):
+            check_name = header_checks[header]
+            if (node, check_name) not in finished:
+                finished.add((node, check_name))
+                finish_timings[check_name].append(monotonic() - started_at)
+        sweeps.append(monotonic() - started_at)
+    return sweeps
+
+
+def print_timings(title: str, timings: Timings, counts=None, counts_title='') -> None:
+    header = f'{title:<40}{"count":>8}{"p50 ms":>10}{"p99 ms":>10}'
+    print(header + f'{counts_title:>10}' if counts is not None else header)
+    for name, values in sorted(timings.items()):
+        line = (f'{name:<40}{len(values):>8}{get_percentile(values, 50) * 1000:>10.1f}'
+                f'{get_percentile(values, 99) * 1000:>10.1f}')
+        if counts is not None:
+            line += f'{counts.get(name, 0):>10}'
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of skale-checks fleet sweeps')
+    parser.add_argument('--kind', choices=['watchdog', 'node'], default='watchdog',
+                        help='watchdog checks by ip or node checks by id')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1, 10, 100],
+                        help='fleet sizes to benchmark')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='latency of each fake server response in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of watchdog responses that fail')
+    parser.add_argument('--schains', type=int, default=8,
+                        help='number of schains in /status/schains payload')
+    parser.add_argument('--max-workers', type=int, default=64)
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--keep-cache', action='store_true',
+                        help='keep cached watchdog responses between rounds')
+    parser.add_argument('--prometheus', action='store_true',
+                        help='print collected metrics in Prometheus text format')
+    args = parser.parse_args()
+
+    profile = WatchdogProfile(latency=args.latency, error_rate=args.error_rate,
+                              schains=args.schains)
+    max_nodes = max(args.nodes)
+    servers = [serve(FakeWatchdog(get_node_ip(index), profile)) for index in range(max_nodes)]
+    checks_class = WatchdogChecks
+    kwargs = {}
+    if args.kind == 'node':
+        chain = serve(FakeChain(max_nodes, latency=args.latency))
+        elasticsearch = serve(FakeElasticsearch(latency=args.latency))
+        servers.extend([chain, elasticsearch])
+        checks_class = NodeChecks
+        kwargs = {'skale': chain.create_skale(), 'es_credentials': elasticsearch.credentials}
+    header_checks = {
+        header: name
+        for name, headers in checks_class.info().items()
+        for header in headers
+    }
+    try:
+        for nodes_number in args.nodes:
+            if args.kind == 'node':
+                nodes = list(range(nodes_number))
+            else:
+                nodes = [get_node_ip(index) for index in range(nodes_number)]
+            fleet_checks = FleetChecks(nodes, max_workers=args.max_workers, **kwargs)
+            finish_timings, metrics = defaultdict(list), TimingsMetrics()
+            set_metrics(PrometheusMetrics() if args.prometheus else metrics)
+            sweeps = run(fleet_checks, header_checks, args.rounds, args.keep_cache,
+                         args.retries, finish_timings)
+            checks_number = sum(len(values) for values in finish_timings.values())
+            print(f'\n{args.kind} checks, {nodes_number} nodes, {args.rounds} rounds')
+            print(f'sweep p50 {get_percentile(sweeps, 50) * 1000:.1f} ms, '
+                  f'{checks_number / sum(sweeps):.1f} checks/s\n')
+            if args.prometheus:
+                print(get_metrics().expose())
+                continue
+            print_timings('check finished since sweep start', finish_timings)
+            print()
+            print_timings('check evaluation', metrics.checks, metrics.check_retries, 'retries')
+            print()
+            print_timings('route', metrics.routes, metrics.route_errors, 'errors')
+            print()
+            print_timings('queue', {'wait for worker': metrics.queue_wait})
+    finally:
+        set_metrics(None)
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
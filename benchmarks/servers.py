@@ -0,0 +1,318 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" Local stand-ins for node watchdogs, SKALE chain and Elasticsearch """
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from eth_abi import encode
+from web3 import HTTPProvider, Web3
+
+from skale_checks.adapters.watchdog import WATCHDOG_PORT
+
+CONTAINERS = {
+    'skale_admin': '2.0.2',
+    'skale_api': '2.0.2',
+    'skale_transaction-manager': '2.0.2',
+    'skale_watchdog': '2.0.2-stable.0',
+    'skale_bounty': '2.0.2-stable.0',
+    'skale_nginx': '1.19.6',
+    'skale_filebeat': '7.3.1'
+}
+NODE_OUTPUTS = ['string', 'bytes4', 'bytes4', 'uint16', 'uint256', 'uint256', 'uint256', 'uint8',
+                'uint256']
+NODES_ADDRESS = Web3.to_checksum_address('0x' + '11' * 20)
+WALLETS_ADDRESS = Web3.to_checksum_address('0x' + '22' * 20)
+BLOCK_NUMBER = 1000
+VALIDATORS_NUMBER = 4
+LOGS_GAP = 10
+
+
+@dataclass
+class WatchdogProfile:
+    """ latency in seconds is added to each response, error_rate is the share of 500 responses """
+    latency: float = 0.0
+    error_rate: float = 0.0
+    schains: int = 8
+
+
+def get_watchdog_payloads(node_ip: str, schains: int) -> Dict[str, Any]:
+    return {
+        '/status/core': [
+            {
+                'name': name,
+                'state': {'Status': 'running', 'ExitCode': 0, 'FinishedAt': ''},
+                'image': f'skalenetwork/{name}:{version}'
+            }
+            for name, version in CONTAINERS.items()
+        ],
+        '/status/sgx': {'status_zmq': True, 'status_https': True,
+                        'sgx_wallet_version': '1.77.1'},
+        '/status/hardware': {'cpu_total_cores': 8, 'memory': 32000000000, 'swap': 0,
+                             'attached_storage_size': 19000000000},
+        '/status/endpoint': {'block_number': BLOCK_NUMBER, 'trusted': True, 'call_speed': 1},
+        '/status/schain-containers-versions': {'skaled_version': '3.7.5-stable.2',
+                                               'ima_version': '1.0.0-stable.1'},
+        '/status/meta-info': {'version': '2.0.2', 'config_stream': '2.0.3',
+                              'docker_lvmpy_stream': '1.0.1-stable.3'},
+        '/status/btrfs': {'kernel_module': True},
+        '/status/ssl': {'is_empty': False, 'issued_to': '*.skale.network',
+                        'expiration_date': '2100-01-01T00:00:00'},
+        '/status/ima': [],
+        '/status/public-ip': {'public_ip': node_ip},
+        '/status/validator-nodes': [[0, node_ip, True]],
+        '/status/check-report': {},
+        '/status/schains': [
+            {'name': f'schain-{i}', 'healthchecks': {'config': True, 'dkg': True, 'rpc': True}}
+            for i in range(schains)
+        ]
+    }
+
+
+class FakeWatchdogHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        profile = self.server.profile
+        time.sleep(profile.latency)
+        if self.path not in self.server.bodies:
+            self.send_body(encode_body(None, f'{self.path} not found'), code=404)
+        elif random.random() < profile.error_rate:
+            self.send_body(encode_body(None, 'internal error'), code=500)
+        else:
+            self.send_body(self.server.bodies[self.path])
+
+    def send_body(self, body: bytes, code=200) -> None:
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeWatchdog(ThreadingHTTPServer):
+    """ Watchdog of one node listening on 127.0.0.x:3009 """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, node_ip: str, profile: WatchdogProfile):
+        self.profile = profile
+        self.bodies = {
+            path: encode_body(data)
+            for path, data in get_watchdog_payloads(node_ip, profile.schains).items()
+        }
+        super().__init__((node_ip, WATCHDOG_PORT), FakeWatchdogHandler)
+
+
+def encode_body(data, error=None) -> bytes:
+    return json.dumps({'data': data, 'error': error}).encode()
+
+
+def get_node_ip(index: int) -> str:
+    return f'127.0.{index // 250}.{index % 250 + 1}'
+
+
+def get_abi_function(name: str, inputs: List[str], outputs: List[str]) -> dict:
+    return {
+        'type': 'function',
+        'name': name,
+        'stateMutability': 'view',
+        'inputs': [{'name': f'arg{i}', 'type': t} for i, t in enumerate(inputs)],
+        'outputs': [{'name': f'out{i}', 'type': t} for i, t in enumerate(outputs)]
+    }
+
+
+NODES_ABI = [
+    get_abi_function('nodes', ['uint256'], NODE_OUTPUTS),
+    get_abi_function('getNodePublicKey', ['uint256'], ['bytes32[2]']),
+    get_abi_function('getNodeDomainName', ['uint256'], ['string']),
+    get_abi_function('isNodeActive', ['uint256'], ['bool']),
+    get_abi_function('getValidatorNodeIndexes', ['uint256'], ['uint256[]'])
+]
+WALLETS_ABI = [get_abi_function('getValidatorBalance', ['uint256'], ['uint256'])]
+
+
+class FakeChainHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.server.latency)
+        if isinstance(body, list):
+            answer = [self.server.answer(request) for request in body]
+        else:
+            answer = self.server.answer(body)
+        data = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeChain(ThreadingHTTPServer):
+    """ JSON-RPC endpoint serving nodes and wallets contracts of the fake fleet """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, nodes_number: int, latency=0.0):
+        self.nodes_number = nodes_number
+        self.latency = latency
+        codec = Web3()
+        self.nodes = codec.eth.contract(address=NODES_ADDRESS, abi=NODES_ABI)
+        self.wallets = codec.eth.contract(address=WALLETS_ADDRESS, abi=WALLETS_ABI)
+        super().__init__(('127.0.0.1', 0), FakeChainHandler)
+
+    @property
+    def endpoint(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def answer(self, request: dict) -> dict:
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': self.get_result(request)}
+
+    def get_result(self, request: dict) -> Any:
+        method, params = request['method'], request.get('params', [])
+        if method == 'eth_blockNumber':
+            return hex(BLOCK_NUMBER)
+        if method == 'eth_chainId':
+            return hex(1)
+        if method == 'eth_getBalance':
+            return hex(10 ** 18)
+        if method != 'eth_call':
+            raise ValueError(f'Method {method} is not supported')
+        contract = self.nodes if params[0]['to'] == NODES_ADDRESS else self.wallets
+        function, args = contract.decode_function_input(params[0]['data'])
+        outputs = [output['type'] for output in function.abi['outputs']]
+        return '0x' + encode(outputs, self.call(function.fn_name, *args.values())).hex()
+
+    def call(self, name: str, *args) -> list:
+        if name == 'nodes':
+            node_id, = args
+            ip = bytes(int(part) for part in get_node_ip(node_id).split('.'))
+            return [f'node-{node_id}', ip, ip, 10000, 0, 0, 0, 0, node_id % VALIDATORS_NUMBER]
+        if name == 'getNodePublicKey':
+            return [[b'\x01' * 32, args[0].to_bytes(32, 'big')]]
+        if name == 'getNodeDomainName':
+            return [f'node-{args[0]}.skale.network']
+        if name == 'isNodeActive':
+            return [True]
+        if name == 'getValidatorNodeIndexes':
+            validator_id, = args
+            return [[
+                node_id for node_id in range(self.nodes_number)
+                if node_id % VALIDATORS_NUMBER == validator_id
+            ]]
+        if name == 'getValidatorBalance':
+            return [10 ** 20]
+        raise ValueError(f'Function {name} is not supported')
+
+    def create_skale(self) -> SimpleNamespace:
+        return create_skale(self.endpoint)
+
+
+def create_skale(endpoint: str) -> SimpleNamespace:
+    """ Returns object with the parts of skale instance used by the checks, partial of it
+    could be passed as skale_factory to worker processes
+    """
+    web3 = Web3(HTTPProvider(endpoint))
+    nodes = web3.eth.contract(address=NODES_ADDRESS, abi=NODES_ABI)
+    wallets = web3.eth.contract(address=WALLETS_ADDRESS, abi=WALLETS_ABI)
+    return SimpleNamespace(
+        web3=web3,
+        nodes=SimpleNamespace(contract=nodes),
+        wallets=SimpleNamespace(
+            contract=wallets,
+            get_validator_balance=lambda vid: wallets.functions.getValidatorBalance(vid).call()
+        )
+    )
+
+
+class FakeElasticsearchHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        lines = [
+            json.loads(line)
+            for line in self.rfile.read(length).decode().splitlines()
+            if line.strip()
+        ]
+        time.sleep(self.server.latency)
+        data = json.dumps({'responses': [self.server.answer(query) for query in lines[1::2]]})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data.encode())
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeElasticsearch(ThreadingHTTPServer):
+    """ Answers logs gaps msearch queries, every node sent logs logs_gap seconds ago """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency=0.0, logs_gap=LOGS_GAP):
+        self.latency = latency
+        self.logs_gap = logs_gap
+        super().__init__(('127.0.0.1', 0), FakeElasticsearchHandler)
+
+    @property
+    def credentials(self) -> tuple:
+        return f'http://127.0.0.1:{self.server_address[1]}', 'user', 'password'
+
+    def answer(self, query: dict) -> dict:
+        now = int(time.time() * 1000)
+        if 'script_fields' in query:
+            return {'hits': {'hits': [{'fields': {'now': [now]}}]}}
+        return {
+            'hits': {'hits': []},
+            'aggregations': {'nodes': {'buckets': [
+                {'key': node_id, 'last_timestamp': {'value': now - self.logs_gap * 1000}}
+                for node_id in query['query']['terms']['fields.id']
+            ]}}
+        }
+
+
+def serve(server: ThreadingHTTPServer) -> ThreadingHTTPServer:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -6,16 +6,34 @@ from setuptools import (
 )
 
 extras_require = {
+    'node': [
+        "skale.py",
+        "elasticsearch==7.12.0"
+    ],
+    'async': [
+        "aiohttp"
+    ],
+    'results': [
+        "numpy"
+    ],
+    'fast': [
+        "orjson"
+    ],
     'linter': [
         "flake8==3.7.9"
     ],
     'dev': [
-        "twine==3.1.1"
+        "twine==3.1.1",
+        "pytest"
     ],
 }
 
+extras_require['all'] = (
+    extras_require['node'] + extras_require['async'] + extras_require['results'] +
+    extras_require['fast']
+)
 extras_require['dev'] = (
-    extras_require['linter'] + extras_require['dev']
+    extras_require['all'] + extras_require['linter'] + extras_require['dev']
 )
 
 setup(
@@ -27,13 +45,13 @@ setup(
     author_email='support@skalelabs.com',
     url='https://github.com/skalenetwork/skale-checks',
     install_requires=[
-        "skale.py",
-        "elasticsearch==7.12.0"
+        "requests",
+        "PyYAML"
     ],
     python_requires='>=3.11,<4',
     extras_require=extras_require,
     keywords=['skale', 'checks'],
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*', 'tests', 'tests.*']),
     package_data={
         'skale_checks': ['requirements.yaml']
     },
@@ -0,0 +1,169 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+from time import monotonic
+from typing import Dict, Optional, Union
+
+FAILURE_THRESHOLD_DEFAULT = 3
+RESET_TIMEOUT_DEFAULT = 30
+PROBE_POLL_INTERVAL = 0.05
+
+
+class Probe:
+    """ First request to the host, other requests to it wait for its outcome,
+    reached is None if the probe was released without an outcome
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.reached: Optional[bool] = None
+
+
+class CircuitBreaker:
+    """ Fails requests to unreachable host fast
+
+    Until a request reaches the host only one probe request is sent, other requests wait
+    for it and are rejected if the probe fails. After failure_threshold connect failures
+    or timeouts in a row the circuit is open and requests are rejected, after reset_timeout
+    seconds one probe request is allowed (half-open), the circuit is closed again once
+    a request reaches the host
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD_DEFAULT,
+                 reset_timeout=RESET_TIMEOUT_DEFAULT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.reached = False
+        self.probe: Optional[Probe] = None
+        self.__lock = threading.Lock()
+
+    def check_request(self) -> Union[bool, Probe]:
+        """ Returns whether the request is allowed or the probe it should wait for """
+        with self.__lock:
+            if self.state == self.OPEN:
+                if monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.HALF_OPEN:
+                return False
+            if self.reached:
+                return True
+            if self.probe is not None:
+                return self.probe
+            self.probe = Probe()
+            return True
+
+    def allow_request(self, timeout=None) -> bool:
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            allowed = self.check_request()
+            if not isinstance(allowed, Probe):
+                return allowed
+            remaining = None if deadline is None else max(deadline - monotonic(), 0)
+            if not allowed.done.wait(remaining):
+                return False
+            if allowed.reached is not None:
+                return allowed.reached
+
+    async def aallow_request(self, timeout=None) -> bool:
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            allowed = self.check_request()
+            if not isinstance(allowed, Probe):
+                return allowed
+            while not allowed.done.is_set():
+                if deadline is not None and monotonic() >= deadline:
+                    return False
+                await asyncio.sleep(PROBE_POLL_INTERVAL)
+            if allowed.reached is not None:
+                return allowed.reached
+
+    def report(self, reachable: bool) -> None:
+        """ Records whether the allowed request reached the host """
+        with self.__lock:
+            if reachable:
+                self.state = self.CLOSED
+                self.failures = 0
+                self.reached = True
+            else:
+                self.failures += 1
+                if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                    self.state = self.OPEN
+                    self.opened_at = monotonic()
+            probe, self.probe = self.probe, None
+        if probe is not None:
+            probe.reached = reachable
+            probe.done.set()
+
+    def release(self) -> None:
+        """ Forgets the allowed request that ended with neither reaching the host nor
+        a connect failure, e.g. cancelled one. Waiting requests try again
+        """
+        with self.__lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+            probe, self.probe = self.probe, None
+        if probe is not None:
+            probe.done.set()
+
+    def reset(self) -> None:
+        """ Closes the circuit and forgets failures, the host is probed again """
+        with self.__lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.reached = False
+
+
+class CircuitBreakers:
+    """ Circuit breakers of hosts shared by all connectors """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD_DEFAULT,
+                 reset_timeout=RESET_TIMEOUT_DEFAULT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.__breakers: Dict[str, CircuitBreaker] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        with self.__lock:
+            breaker = self.__breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.__breakers[host] = breaker
+            return breaker
+
+    def reset(self, host=None) -> None:
+        """ Closes circuit of the host, of all hosts by default """
+        with self.__lock:
+            if host is None:
+                breakers = list(self.__breakers.values())
+            else:
+                breakers = [self.__breakers[host]] if host in self.__breakers else []
+        for breaker in breakers:
+            breaker.reset()
@@ -0,0 +1,111 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from skale_checks.adapters.connectors import Response
+
+CACHE_MAXSIZE_DEFAULT = 4096
+
+
+class ResponseCache:
+    """ Thread-safe LRU cache of ok responses with per-entry TTL """
+
+    def __init__(self, maxsize=CACHE_MAXSIZE_DEFAULT):
+        self.maxsize = maxsize
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Optional[Response]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at <= monotonic():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return response
+
+    def set(self, key: Hashable, response: Response, ttl: float) -> None:
+        if ttl <= 0 or not response.is_status_ok():
+            return
+        with self.__lock:
+            self.__entries[key] = (monotonic() + ttl, response)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, host=None, path=None) -> None:
+        """ Drops entries of the host and/or path, all entries if nothing is passed """
+        with self.__lock:
+            for key in list(self.__entries):
+                if (host is None or key[0] == host) and (path is None or key[1] == path):
+                    del self.__entries[key]
+
+
+class SingleFlight:
+    """ Concurrent calls with the same key share one in-flight execution and its result """
+
+    def __init__(self):
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self.__lock:
+            call = self.__calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self.__calls[key] = Future()
+        if not is_leader:
+            return call.result()
+        try:
+            result = func()
+            call.set_result(result)
+            return result
+        except BaseException as err:
+            call.set_exception(err)
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+
+class AsyncSingleFlight:
+    """ SingleFlight for coroutines, calls are shared within one event loop """
+
+    def __init__(self):
+        self.__calls = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        key = (id(asyncio.get_running_loop()), key)
+        call = self.__calls.get(key)
+        if call is None:
+            call = self.__calls[key] = asyncio.ensure_future(func())
+            call.add_done_callback(lambda _: self.__calls.pop(key, None))
+        return await asyncio.shield(call)
@@ -0,0 +1,209 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Iterable, List, Optional, Tuple
+
+from skale_checks.adapters.cache import SingleFlight
+from skale_checks.adapters.connectors import get_session
+
+RPC_BATCH_SIZE = 100
+RPC_MAX_WORKERS = 8
+
+RPCRequest = Tuple[str, list]
+
+
+class RPCBatchError(ValueError):
+    pass
+
+
+class ChainSnapshot:
+    """ Chain data shared by all checks of one sweep
+
+    Block number is read once, node and validator balances and active nodes
+    counts of validators are fetched in batches
+    """
+
+    def __init__(self, skale):
+        self.skale = skale
+        self.__block_number = None
+        self.__balances = {}
+        self.__validator_balances = {}
+        self.__active_nodes_counts = {}
+        self.__flight = SingleFlight()
+        self.__lock = threading.Lock()
+
+    @property
+    def block_number(self) -> int:
+        with self.__lock:
+            if self.__block_number is None:
+                self.__block_number = self.skale.web3.eth.block_number
+            return self.__block_number
+
+    def load(self, nodes: Iterable[dict], node_balances=True, validator_balances=True) -> None:
+        """ Prefetches balances of the nodes and balances and active nodes counts
+        of their validators
+        """
+        nodes = list(nodes)
+        if node_balances:
+            addresses = list(dict.fromkeys(get_node_address(node) for node in nodes))
+            balances = batch_request(self.skale.web3, [
+                ('eth_getBalance', [address, 'latest'])
+                for address in addresses
+            ])
+            with self.__lock:
+                self.__balances.update(zip(addresses,
+                                           (int(balance, 16) for balance in balances)))
+        if validator_balances:
+            validator_ids = list(dict.fromkeys(node['validator_id'] for node in nodes))
+            balances = batch_call(self.skale.web3, [
+                self.skale.wallets.contract.functions.getValidatorBalance(validator_id)
+                for validator_id in validator_ids
+            ])
+            active_nodes_counts = get_active_nodes_counts(self.skale, validator_ids)
+            with self.__lock:
+                self.__validator_balances.update(zip(validator_ids, balances))
+                self.__active_nodes_counts.update(zip(validator_ids, active_nodes_counts))
+
+    def get_balance(self, address: str) -> int:
+        balance = self.__balances.get(address)
+        if balance is None:
+            balance = self.__balances[address] = self.skale.web3.eth.get_balance(address)
+        return balance
+
+    def get_validator_balance(self, validator_id: int) -> int:
+        balance = self.__validator_balances.get(validator_id)
+        if balance is None:
+            balance = self.skale.wallets.get_validator_balance(validator_id)
+            self.__validator_balances[validator_id] = balance
+        return balance
+
+    def get_active_nodes_count(self, validator_id: int) -> int:
+        count = self.__active_nodes_counts.get(validator_id)
+        if count is None:
+            count = self.__flight.do(validator_id, partial(self.__fetch_active_nodes_count,
+                                                           validator_id))
+        return count
+
+    def __fetch_active_nodes_count(self, validator_id: int) -> int:
+        count = self.__active_nodes_counts.get(validator_id)
+        if count is None:
+            count = get_active_nodes_count(self.skale, validator_id)
+            self.__active_nodes_counts[validator_id] = count
+        return count
+
+
+def is_node_active(skale, node_id: int) -> bool:
+    return bool(batch_call(skale.web3, [skale.nodes.contract.functions.isNodeActive(node_id)])[0])
+
+
+def get_active_nodes_count(skale, validator_id: int) -> int:
+    return get_active_nodes_counts(skale, [validator_id])[0]
+
+
+def get_active_nodes_counts(skale, validator_ids: List[int]) -> List[int]:
+    """ Counts active nodes of each validator with two batched reads """
+    functions = skale.nodes.contract.functions
+    validators_node_ids = batch_call(skale.web3, [
+        functions.getValidatorNodeIndexes(validator_id)
+        for validator_id in validator_ids
+    ])
+    node_ids = list(dict.fromkeys(
+        node_id for validator_node_ids in validators_node_ids for node_id in validator_node_ids
+    ))
+    active_nodes = dict(zip(node_ids, batch_call(skale.web3, [
+        functions.isNodeActive(node_id)
+        for node_id in node_ids
+    ])))
+    return [
+        sum(active_nodes[node_id] for node_id in validator_node_ids)
+        for validator_node_ids in validators_node_ids
+    ]
+
+
+def get_node_address(node: dict) -> str:
+    from skale.utils.web3_utils import public_key_to_address
+    from web3 import Web3
+    return Web3.to_checksum_address(public_key_to_address(node['publicKey']))
+
+
+def batch_call(web3, calls: List[Any], batch_size=RPC_BATCH_SIZE) -> List[Any]:
+    """ Executes contract read calls in JSON-RPC batches, results are ordered as calls """
+    results = batch_request(web3, [
+        ('eth_call', [{'to': call.address, 'data': call._encode_transaction_data()}, 'latest'])
+        for call in calls
+    ], batch_size=batch_size)
+    return [decode_result(web3, call, result) for call, result in zip(calls, results)]
+
+
+def batch_request(web3, requests: List[RPCRequest], batch_size=RPC_BATCH_SIZE) -> List[Any]:
+    """ Sends JSON-RPC requests in batches, returns raw results ordered as requests
+
+    Providers without HTTP endpoint fall back to concurrent single requests
+    """
+    endpoint = get_http_endpoint(web3)
+    if endpoint is None:
+        with ThreadPoolExecutor(max_workers=RPC_MAX_WORKERS) as executor:
+            return list(executor.map(lambda request: send_request(web3, *request), requests))
+    results = []
+    for start in range(0, len(requests), batch_size):
+        results.extend(send_batch(web3, endpoint, requests[start:start + batch_size]))
+    return results
+
+
+def send_batch(web3, endpoint: str, requests: List[RPCRequest]) -> List[Any]:
+    payload = [
+        {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+        for request_id, (method, params) in enumerate(requests)
+    ]
+    response = get_session().post(endpoint, json=payload,
+                                  **dict(web3.provider.get_request_kwargs()))
+    response.raise_for_status()
+    answers = {answer['id']: answer for answer in response.json()}
+    return [
+        get_result(requests[request_id], answers.get(request_id))
+        for request_id in range(len(requests))
+    ]
+
+
+def send_request(web3, method: str, params: list) -> Any:
+    return get_result((method, params), web3.provider.make_request(method, params))
+
+
+def get_result(request: RPCRequest, answer: Optional[dict]) -> Any:
+    if answer is None or 'error' in answer:
+        error = answer['error'] if answer else 'no answer'
+        raise RPCBatchError(f'{request[0]} {request[1]} failed: {error}')
+    return answer['result']
+
+
+def decode_result(web3, call, result: str) -> Any:
+    from hexbytes import HexBytes
+    from web3._utils.abi import get_abi_output_types
+    values = web3.codec.decode(get_abi_output_types(call.abi), HexBytes(result))
+    if len(values) == 1:
+        return values[0]
+    return list(values)
+
+
+def get_http_endpoint(web3) -> Optional[str]:
+    endpoint = str(getattr(web3.provider, 'endpoint_uri', None) or '')
+    return endpoint if endpoint.startswith('http') else None
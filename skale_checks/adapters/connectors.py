@@ -17,14 +17,37 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import hashlib
+import json
+import threading
 from dataclasses import dataclass
+from time import perf_counter
+from typing import Mapping, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from skale_checks.adapters.breaker import CircuitBreaker
+from skale_checks.metrics import REQUEST_DURATION, get_metrics
+
+POOL_SIZE_DEFAULT = 2
+HOSTS_POOLS_MAX = 100
+
+_sessions = {}
+_sessions_lock = threading.Lock()
 
 
 @dataclass
 class Response:
     status: str
     payload: dict
+    fingerprint: Optional[str] = None
 
     ERROR_STATUS = 'error'
     OK_STATUS = 'ok'
@@ -34,27 +57,165 @@ class Response:
 
 
 class Connector:
-    def __init__(self, ip, timeout=10):
+    def __init__(self, ip, timeout=10, connect_timeout=None, pool_size=POOL_SIZE_DEFAULT,
+                 breaker: Optional[CircuitBreaker] = None):
         self.ip = ip
         self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = breaker
+        self.session = get_session(pool_size)
 
     def send_request(self, path) -> Response:
+        metrics = get_metrics()
+        if not metrics.enabled:
+            return self.__send_request(path)
+        started_at = perf_counter()
+        response = self.__send_request(path)
+        metrics.observe(REQUEST_DURATION, perf_counter() - started_at, path=path,
+                        status=response.status)
+        return response
+
+    def __send_request(self, path) -> Response:
+        if self.breaker is not None and not self.breaker.allow_request(sum(self.get_timeouts())):
+            return construct_circuit_open_response(self.ip)
+        reachable = None
         try:
             url = f'{self.ip}{path}'
-            response = requests.get(url=url, timeout=self.timeout)
+            response = self.session.get(url=url, timeout=self.get_timeouts())
+            reachable = True
             response.raise_for_status()
-            raw_data = response.json()
-            if raw_data['error']:
-                return construct_err_response(raw_data['error'])
-            return construct_ok_response(raw_data['data'])
-        except requests.exceptions.RequestException as msg:
+            return construct_response(decode_json(response.content),
+                                      get_fingerprint(response.headers, response.content))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as msg:
+            if reachable is None:
+                reachable = False
             return construct_err_response(msg=str(msg))
+        except (requests.exceptions.RequestException, ValueError) as msg:
+            return construct_err_response(msg=str(msg))
+        finally:
+            if self.breaker is not None:
+                report_outcome(self.breaker, reachable)
+
+    def get_timeouts(self) -> tuple:
+        connect_timeout = self.timeout if self.connect_timeout is None else self.connect_timeout
+        return connect_timeout, self.timeout
+
+
+class AsyncConnector:
+    def __init__(self, ip, timeout=10, connect_timeout=None, session=None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.ip = ip
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = breaker
+        self.session = session
+
+    async def send_request(self, path) -> Response:
+        metrics = get_metrics()
+        if not metrics.enabled:
+            return await self.__send_session_request(path)
+        started_at = perf_counter()
+        response = await self.__send_session_request(path)
+        metrics.observe(REQUEST_DURATION, perf_counter() - started_at, path=path,
+                        status=response.status)
+        return response
+
+    async def __send_session_request(self, path) -> Response:
+        import aiohttp
+        if self.session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.__send_request(session, path)
+        return await self.__send_request(self.session, path)
+
+    async def __send_request(self, session, path) -> Response:
+        import aiohttp
+        if self.breaker is not None and not await self.breaker.aallow_request(self.timeout):
+            return construct_circuit_open_response(self.ip)
+        reachable = None
+        try:
+            url = f'{self.ip}{path}'
+            timeout = aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout)
+            async with session.get(url, timeout=timeout) as response:
+                reachable = True
+                response.raise_for_status()
+                body = await response.read()
+                return construct_response(decode_json(body),
+                                          get_fingerprint(response.headers, body))
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as msg:
+            if reachable is None:
+                reachable = False
+            return construct_err_response(msg=str(msg) or type(msg).__name__)
+        except (aiohttp.ClientError, ValueError) as msg:
+            return construct_err_response(msg=str(msg) or type(msg).__name__)
+        finally:
+            if self.breaker is not None:
+                report_outcome(self.breaker, reachable)
+
+
+def report_outcome(breaker: CircuitBreaker, reachable: Optional[bool]) -> None:
+    """ Only connect failures and timeouts count as failures, the breaker is released
+    after other errors and cancellation, so they do not open circuits of healthy hosts
+    """
+    if reachable is None:
+        breaker.release()
+    else:
+        breaker.report(reachable)
+
+
+def get_session(pool_size=POOL_SIZE_DEFAULT) -> requests.Session:
+    """ Returns keep-alive session shared by all connectors
+
+    Session keeps pools of up to HOSTS_POOLS_MAX recently used hosts, least recently
+    used pools are closed. Each pool keeps at most pool_size idle connections,
+    connections above it are closed once the request is finished
+    """
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HOSTS_POOLS_MAX, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[pool_size] = session
+        return session
+
+
+def decode_json(content: bytes):
+    """ Decodes JSON body with orjson if it is installed, it is much faster for large payloads """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def get_fingerprint(headers: Mapping[str, str], content: bytes) -> str:
+    """ Identifies payload by ETag or Last-Modified header, by hash of the body otherwise """
+    validator = headers.get('ETag') or headers.get('Last-Modified')
+    if validator:
+        return validator
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def construct_response(raw_data, fingerprint=None) -> Response:
+    if raw_data['error']:
+        return construct_err_response(raw_data['error'])
+    return construct_ok_response(raw_data['data'], fingerprint=fingerprint)
+
+
+def construct_circuit_open_response(host) -> Response:
+    return construct_err_response(f'Circuit of {host} is open after connection failures')
 
 
-def construct_ok_response(data=None) -> Response:
+def construct_ok_response(data=None, fingerprint=None) -> Response:
     if data is None:
         data = {}
-    return Response(Response.OK_STATUS, data)
+    return Response(Response.OK_STATUS, data, fingerprint)
 
 
 def construct_err_response(msg=None) -> Response:
@@ -0,0 +1,136 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+from time import monotonic
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    from elasticsearch import Elasticsearch
+
+ES_MAX_RETRIES = 3
+LOGS_GAPS_TTL = 60
+TIME_QUERY = {
+    'size': 1,
+    'script_fields': {
+        'now': {
+            'script': 'new Date().getTime()'
+        }
+    }
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class ElasticLogs:
+    """ Answers how long ago nodes sent their last logs
+
+    Gaps for many nodes are fetched with one terms/max aggregation, the current time
+    is taken from Elasticsearch in the same request. Loaded gaps are used for ttl seconds
+    """
+
+    def __init__(self, es_credentials, timeout=None, ttl=LOGS_GAPS_TTL):
+        self.client = get_es_client(es_credentials, timeout)
+        self.ttl = ttl
+        self.__gaps = {}
+
+    def load(self, node_ids: Iterable[int]) -> None:
+        """ Prefetches logs gaps for the nodes, failed request marks all nodes without logs """
+        from elasticsearch import ElasticsearchException
+        node_ids = list(node_ids)
+        try:
+            gaps = self.get_logs_gaps(node_ids)
+        except (ConnectionError, ElasticsearchException):
+            gaps = dict.fromkeys(node_ids)
+        expires_at = monotonic() + self.ttl
+        self.__gaps.update((node_id, (gap, expires_at)) for node_id, gap in gaps.items())
+
+    def get_logs_gap(self, node_id: int) -> Optional[float]:
+        """ Returns seconds since the last log of the node, None if there are no logs """
+        loaded = self.__gaps.get(node_id)
+        if loaded is not None and loaded[1] > monotonic():
+            return loaded[0]
+        return self.get_logs_gaps([node_id])[node_id]
+
+    def get_logs_gaps(self, node_ids: Iterable[int]) -> Dict[int, Optional[float]]:
+        from elasticsearch import ElasticsearchException
+        node_ids = list(node_ids)
+        query = {
+            'size': 0,
+            'query': {
+                'terms': {
+                    'fields.id': node_ids
+                }
+            },
+            'aggs': {
+                'nodes': {
+                    'terms': {
+                        'field': 'fields.id',
+                        'size': max(len(node_ids), 1)
+                    },
+                    'aggs': {
+                        'last_timestamp': {
+                            'max': {
+                                'field': '@timestamp'
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        responses = self.client.msearch(body=[{}, query, {}, TIME_QUERY])['responses']
+        for response in responses:
+            if 'error' in response:
+                raise ElasticsearchException(response['error'])
+        nodes_response, time_response = responses
+        current_time = time_response['hits']['hits'][0]['fields']['now'][0]
+        last_timestamps = {
+            str(bucket['key']): bucket['last_timestamp']['value']
+            for bucket in nodes_response['aggregations']['nodes']['buckets']
+        }
+        return {
+            node_id: get_gap(current_time, last_timestamps.get(str(node_id)))
+            for node_id in node_ids
+        }
+
+
+def get_gap(current_time, last_timestamp) -> Optional[float]:
+    if last_timestamp is None:
+        return None
+    return (current_time - last_timestamp) / 1000
+
+
+def get_es_client(es_credentials, timeout=None) -> 'Elasticsearch':
+    """ Returns Elasticsearch client shared by all checks with the same credentials """
+    from elasticsearch import Elasticsearch
+    key = (tuple(es_credentials), timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            es_args = {}
+            if timeout:
+                es_args = {
+                    'timeout': timeout,
+                    'max_retries': ES_MAX_RETRIES,
+                    'retry_on_timeout': True
+                }
+            client = Elasticsearch(es_credentials[0], http_auth=es_credentials[1:3], **es_args)
+            _clients[key] = client
+        return client
@@ -17,37 +17,69 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import re
-from functools import lru_cache, partial
+from functools import partial
+from typing import Optional
 
-from skale_checks.adapters.connectors import (Connector, construct_ok_response,
-                                              construct_err_response, Response)
+from skale_checks.adapters.breaker import CircuitBreakers
+from skale_checks.adapters.cache import AsyncSingleFlight, ResponseCache, SingleFlight
+from skale_checks.adapters.connectors import (AsyncConnector, Connector, construct_ok_response,
+                                              construct_err_response, Response,
+                                              POOL_SIZE_DEFAULT)
 
 WATCHDOG_TIMEOUT_DEFAULT = 10
 WATCHDOG_PORT = 3009
+WATCHDOG_ROUTES = {
+    'core_status': '/status/core',
+    'sgx_status': '/status/sgx',
+    'hardware_status': '/status/hardware',
+    'endpoint_status': '/status/endpoint',
+    'schain_containers_versions_status': '/status/schain-containers-versions',
+    'meta_status': '/status/meta-info',
+    'btrfs_status': '/status/btrfs',
+    'ssl_status': '/status/ssl',
+    'ima_status': '/status/ima',
+    'public_ip': '/status/public-ip',
+    'validator_nodes': '/status/validator-nodes',
+    'check_report': '/status/check-report',
+    'schains_status': '/status/schains'
+}
+WATCHDOG_ROUTES_TTL = {
+    'core_status': 10,
+    'sgx_status': 60,
+    'hardware_status': 600,
+    'endpoint_status': 5,
+    'schain_containers_versions_status': 600,
+    'meta_status': 600,
+    'btrfs_status': 600,
+    'ssl_status': 600,
+    'ima_status': 10,
+    'public_ip': 600,
+    'validator_nodes': 60,
+    'check_report': 10,
+    'schains_status': 10
+}
+
+ROUTES_CACHE = ResponseCache()
+HOSTS_BREAKERS = CircuitBreakers()
+ROUTES_FLIGHT = SingleFlight()
+ASYNC_ROUTES_FLIGHT = AsyncSingleFlight()
 
 
 class WatchdogConnector(Connector):
-    __ROUTES = {
-        'core_status': '/status/core',
-        'sgx_status': '/status/sgx',
-        'hardware_status': '/status/hardware',
-        'endpoint_status': '/status/endpoint',
-        'schain_containers_versions_status': '/status/schain-containers-versions',
-        'meta_status': '/status/meta-info',
-        'btrfs_status': '/status/btrfs',
-        'ssl_status': '/status/ssl',
-        'ima_status': '/status/ima',
-        'public_ip': '/status/public-ip',
-        'validator_nodes': '/status/validator-nodes',
-        'check_report': '/status/check-report',
-        'schains_status': '/status/schains'
-    }
+    __ROUTES = WATCHDOG_ROUTES
 
-    def __init__(self, node_ip, timeout=WATCHDOG_TIMEOUT_DEFAULT):
+    def __init__(self, node_ip, timeout=WATCHDOG_TIMEOUT_DEFAULT, connect_timeout=None,
+                 pool_size=POOL_SIZE_DEFAULT, cache=ROUTES_CACHE, routes_ttl=None,
+                 breakers=HOSTS_BREAKERS):
         self.watchdog_url = get_watchdog_url(node_ip)
         self.timeout = timeout
-        super().__init__(self.watchdog_url, self.timeout)
+        self.cache = cache
+        self.routes_ttl = WATCHDOG_ROUTES_TTL if routes_ttl is None else routes_ttl
+        breaker = breakers.get(self.watchdog_url) if breakers is not None else None
+        super().__init__(self.watchdog_url, self.timeout, connect_timeout=connect_timeout,
+                         pool_size=pool_size, breaker=breaker)
 
     def __getattr__(self, attr):
         return partial(self.__watchdog_call, attr=attr)
@@ -56,66 +88,222 @@ class WatchdogConnector(Connector):
         route = self.__ROUTES.get(attr)
         if not route:
             raise AttributeError(attr)
-        return super().send_request(route)
+        ttl = self.routes_ttl.get(attr, 0)
+        if self.cache is None or not ttl:
+            return ROUTES_FLIGHT.do((self.watchdog_url, route),
+                                    partial(self.send_request, route))
+        return self.cache.get((self.watchdog_url, route)) or ROUTES_FLIGHT.do(
+            (self.watchdog_url, route),
+            partial(self.__fetch_cached, route, ttl)
+        )
+
+    def __fetch_cached(self, route, ttl) -> Response:
+        response = self.cache.get((self.watchdog_url, route))
+        if response is None:
+            response = self.send_request(route)
+            self.cache.set((self.watchdog_url, route), response, ttl)
+        return response
+
+    def invalidate(self, attr=None) -> None:
+        """ Drops cached responses of the route, all routes of the node by default """
+        if self.cache is not None:
+            path = None if attr is None else self.__ROUTES[attr]
+            self.cache.invalidate(self.watchdog_url, path)
 
 
 class Watchdog(WatchdogConnector):
-    def __init__(self, node_ip, timeout=WATCHDOG_TIMEOUT_DEFAULT):
-        super().__init__(node_ip, timeout)
+    def __init__(self, node_ip, timeout=WATCHDOG_TIMEOUT_DEFAULT, connect_timeout=None,
+                 pool_size=POOL_SIZE_DEFAULT, cache=ROUTES_CACHE, routes_ttl=None,
+                 breakers=HOSTS_BREAKERS):
+        super().__init__(node_ip, timeout, connect_timeout=connect_timeout, pool_size=pool_size,
+                         cache=cache, routes_ttl=routes_ttl, breakers=breakers)
+        self.__schains_index = None
 
-    @lru_cache(maxsize=10)
     def get_skale_containers(self) -> Response:
-        containers_response = self.core_status()
-        if not containers_response.is_status_ok():
-            return construct_err_response(containers_response.payload)
-        containers = containers_response.payload
-        data = {
-            container['name']: {
-                'status': container['state']['Status'],
-                'exitCode': container['state']['ExitCode'],
-                'finishedAt': container['state']['FinishedAt'],
-                'version': container['image']
-            } for container in containers if container['name'].startswith('skale_')
-        }
-        return construct_ok_response(data)
+        return compose_skale_containers(self.core_status())
 
     def get_component_versions(self):
         containers_response = self.get_skale_containers()
         if not containers_response.is_status_ok():
             return construct_err_response(containers_response.payload)
-        schain_versions_response = self.schain_containers_versions_status()
-        if not schain_versions_response.is_status_ok():
-            return construct_err_response(schain_versions_response.payload)
-        meta_response = self.meta_status()
-        if not meta_response.is_status_ok():
-            return construct_err_response(meta_response.payload)
-        versions = {
-            name: get_container_version(container['version'])
-            for name, container in containers_response.payload.items()
-        }
-        versions.update({
-            'schain': schain_versions_response.payload['skaled_version'],
-            'ima': schain_versions_response.payload['ima_version']
-        })
-        os_id = meta_response.payload.get('os_id', None)
-        os_version = meta_response.payload.get('os_version', None)
-        versions.update({
-            'node-cli': meta_response.payload['version'],
-            'configs': meta_response.payload['config_stream'],
-            'docker-lvmpy': meta_response.payload['docker_lvmpy_stream'],
-            'os_id': os_id,
-            'os_version': os_version
-        })
-        return construct_ok_response(versions)
+        return compose_component_versions(
+            containers_response,
+            self.schain_containers_versions_status(),
+            self.meta_status()
+        )
 
-    def get_schain_status(self, schain_name):
+    def get_schain_statuses(self) -> Response:
+        """ Returns statuses of all schains of the node indexed by schain name
+
+        Index is built once for each fetched /status/schains response
+        """
         schains_response = self.schains_status()
-        if not schains_response.is_status_ok():
-            return construct_err_response(schains_response.payload)
-        for schain in schains_response.payload:
-            if schain['name'] == schain_name:
-                return construct_ok_response(schain)
+        indexed = self.__schains_index
+        if indexed is None or indexed[0] is not schains_response:
+            indexed = self.__schains_index = (schains_response,
+                                              index_schains(schains_response))
+        return indexed[1]
+
+    def get_schain_status(self, schain_name):
+        return find_schain_status(self.get_schain_statuses(), schain_name)
+
+    def get_route_fingerprint(self, attr) -> Optional[str]:
+        """ Returns fingerprint of the route payload, None if the route is not available """
+        response = getattr(self, attr)()
+        return response.fingerprint if response.is_status_ok() else None
+
+
+class WatchdogSnapshot(Watchdog):
+    """ Watchdog that serves already fetched responses instead of sending requests """
+
+    def __init__(self, node_ip, responses, timeout=WATCHDOG_TIMEOUT_DEFAULT):
+        self.responses = responses
+        super().__init__(node_ip, timeout, cache=None, breakers=None)
+
+    def __getattr__(self, attr):
+        route = WATCHDOG_ROUTES.get(attr)
+        if not route:
+            raise AttributeError(attr)
+        return partial(self.send_request, route)
+
+    def send_request(self, path) -> Response:
+        if path not in self.responses:
+            return construct_err_response(f'Route {path} is not fetched')
+        return self.responses[path]
+
+
+class AsyncWatchdogConnector(AsyncConnector):
+    __ROUTES = WATCHDOG_ROUTES
+
+    def __init__(self, node_ip, timeout=WATCHDOG_TIMEOUT_DEFAULT, connect_timeout=None,
+                 session=None, cache=ROUTES_CACHE, routes_ttl=None, breakers=HOSTS_BREAKERS):
+        self.watchdog_url = get_watchdog_url(node_ip)
+        self.timeout = timeout
+        self.cache = cache
+        self.routes_ttl = WATCHDOG_ROUTES_TTL if routes_ttl is None else routes_ttl
+        breaker = breakers.get(self.watchdog_url) if breakers is not None else None
+        super().__init__(self.watchdog_url, self.timeout, connect_timeout=connect_timeout,
+                         session=session, breaker=breaker)
+
+    def __getattr__(self, attr):
+        return partial(self.__watchdog_call, attr=attr)
+
+    async def __watchdog_call(self, attr):
+        route = self.__ROUTES.get(attr)
+        if not route:
+            raise AttributeError(attr)
+        ttl = self.routes_ttl.get(attr, 0)
+        if self.cache is None or not ttl:
+            return await ASYNC_ROUTES_FLIGHT.do((self.watchdog_url, route),
+                                                partial(self.send_request, route))
+        return self.cache.get((self.watchdog_url, route)) or await ASYNC_ROUTES_FLIGHT.do(
+            (self.watchdog_url, route),
+            partial(self.__fetch_cached, route, ttl)
+        )
+
+    async def __fetch_cached(self, route, ttl) -> Response:
+        response = self.cache.get((self.watchdog_url, route))
+        if response is None:
+            response = await self.send_request(route)
+            self.cache.set((self.watchdog_url, route), response, ttl)
+        return response
+
+
+class AsyncWatchdog(AsyncWatchdogConnector):
+    def __init__(self, node_ip, timeout=WATCHDOG_TIMEOUT_DEFAULT, connect_timeout=None,
+                 session=None, cache=ROUTES_CACHE, routes_ttl=None, breakers=HOSTS_BREAKERS):
+        super().__init__(node_ip, timeout, connect_timeout=connect_timeout, session=session,
+                         cache=cache, routes_ttl=routes_ttl, breakers=breakers)
+        self.__schains_index = None
+
+    async def get_skale_containers(self) -> Response:
+        return compose_skale_containers(await self.core_status())
+
+    async def get_component_versions(self):
+        core_response, schain_versions_response, meta_response = await asyncio.gather(
+            self.core_status(),
+            self.schain_containers_versions_status(),
+            self.meta_status()
+        )
+        containers_response = compose_skale_containers(core_response)
+        if not containers_response.is_status_ok():
+            return construct_err_response(containers_response.payload)
+        return compose_component_versions(
+            containers_response,
+            schain_versions_response,
+            meta_response
+        )
+
+    async def get_schain_statuses(self) -> Response:
+        schains_response = await self.schains_status()
+        indexed = self.__schains_index
+        if indexed is None or indexed[0] is not schains_response:
+            indexed = self.__schains_index = (schains_response,
+                                              index_schains(schains_response))
+        return indexed[1]
+
+    async def get_schain_status(self, schain_name):
+        return find_schain_status(await self.get_schain_statuses(), schain_name)
+
+
+def compose_skale_containers(containers_response) -> Response:
+    if not containers_response.is_status_ok():
+        return construct_err_response(containers_response.payload)
+    containers = containers_response.payload
+    data = {
+        container['name']: {
+            'status': container['state']['Status'],
+            'exitCode': container['state']['ExitCode'],
+            'finishedAt': container['state']['FinishedAt'],
+            'version': container['image']
+        } for container in containers if container['name'].startswith('skale_')
+    }
+    return construct_ok_response(data)
+
+
+def compose_component_versions(containers_response, schain_versions_response,
+                               meta_response) -> Response:
+    if not schain_versions_response.is_status_ok():
+        return construct_err_response(schain_versions_response.payload)
+    if not meta_response.is_status_ok():
+        return construct_err_response(meta_response.payload)
+    versions = {
+        name: get_container_version(container['version'])
+        for name, container in containers_response.payload.items()
+    }
+    versions.update({
+        'schain': schain_versions_response.payload['skaled_version'],
+        'ima': schain_versions_response.payload['ima_version']
+    })
+    os_id = meta_response.payload.get('os_id', None)
+    os_version = meta_response.payload.get('os_version', None)
+    versions.update({
+        'node-cli': meta_response.payload['version'],
+        'configs': meta_response.payload['config_stream'],
+        'docker-lvmpy': meta_response.payload['docker_lvmpy_stream'],
+        'os_id': os_id,
+        'os_version': os_version
+    })
+    return construct_ok_response(versions)
+
+
+def index_schains(schains_response) -> Response:
+    if not schains_response.is_status_ok():
+        return construct_err_response(schains_response.payload)
+    return construct_ok_response(
+        {schain['name']: schain for schain in schains_response.payload},
+        fingerprint=schains_response.fingerprint
+    )
+
+
+def find_schain_status(schains_statuses, schain_name) -> Response:
+    """ Looks up the schain in statuses indexed by name """
+    if not schains_statuses.is_status_ok():
+        return construct_err_response(schains_statuses.payload)
+    schain = schains_statuses.payload.get(schain_name)
+    if schain is None:
         return construct_err_response(f'sChain {schain_name} not found')
+    return construct_ok_response(schain)
 
 
 def get_watchdog_url(node_ip):
@@ -17,99 +17,450 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import inspect
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import threading
+from concurrent.futures import (FIRST_COMPLETED, CancelledError, Executor, Future,
+                                ThreadPoolExecutor, wait)
+from dataclasses import dataclass
 from functools import wraps, partial
-from time import sleep
+from math import inf
+from time import monotonic, perf_counter, sleep
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 
-from skale_checks.checks.types import ChecksDict, CheckStatus, Func, CheckRunners
-from skale_checks.checks.utils import get_requirements
+from skale_checks.checks.types import CheckResult, ChecksDict, CheckStatus, Func, NodeKey
+from skale_checks.checks.utils import (call_started, delayed_calls, get_backoff,
+                                       get_requirements, set_future_result)
+from skale_checks.metrics import CHECK_DURATION, CHECK_RETRIES, get_metrics, submit
 
-MAX_WORKERS = 3
+logger = logging.getLogger(__name__)
 
+MAX_WORKERS = 16
 
-def check(result_headers) -> Func:
+
+def check(result_headers, routes=None, timeout=None, volatile=False, interval=None,
+          cost=1) -> Func:
+    """ Marks method as a check
+
+    routes are watchdog routes the check depends on, timeout is the default
+    deadline of the check in seconds, volatile checks depend on more than
+    their routes payloads and are always evaluated. interval is the default
+    period of the check in continuous monitoring and cost is its relative load
+    """
     def real_decorator(checker):
         checker.is_check = True
         checker.headers = result_headers
+        checker.routes = routes
+        checker.timeout = timeout
+        checker.volatile = volatile
+        checker.interval = interval
+        checker.cost = cost
 
         @wraps(checker)
         def wrapper(*args, retries=1, delay=0, **kwargs) -> ChecksDict:
+            metrics = get_metrics()
+            started_at = perf_counter()
             results = []
-            for _ in range(retries):
+            for attempt in range(retries):
+                if attempt and metrics.enabled:
+                    metrics.increment(CHECK_RETRIES, check=checker.__name__)
                 results = checker(*args, **kwargs)
                 if not isinstance(results, tuple):
                     results = [results]
                 if None not in results:
                     break
-                sleep(delay)
+                if attempt + 1 < retries:
+                    sleep(get_backoff(attempt, delay))
             wrapped_results = [
                 CheckStatus.UNKNOWN if result is None else CheckStatus(result)
                 for result in results
             ]
+            if metrics.enabled:
+                metrics.observe(CHECK_DURATION, perf_counter() - started_at,
+                                check=checker.__name__)
             return dict(zip(result_headers, wrapped_results))
         return wrapper
     return real_decorator
 
 
+@dataclass
+class ChecksPlan:
+    """ Watchdog routes needed by the checks, each route is requested once """
+    routes: List[str]
+    routed: List[Func]
+    unrouted: List[Func]
+
+    @property
+    def concurrency(self) -> int:
+        return max(min(len(self.routes) + len(self.unrouted), MAX_WORKERS), 1)
+
+
 class BaseChecks:
+    checks_registry: Dict[str, Func] = {}
+    node_key: Optional[NodeKey] = None
+
     def __init__(self, network='mainnet', requirements_path=None):
         self.requirements = get_requirements(network, requirements_path)
 
-    @classmethod
-    def info(cls):
-        checks_info = {}
-        checks = inspect.getmembers(
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.checks_registry = dict(inspect.getmembers(
             cls,
             predicate=lambda m: inspect.isfunction(m) and getattr(m, 'is_check', None)
+        ))
+
+    @classmethod
+    def info(cls):
+        return {
+            name: method.headers
+            for name, method in cls.checks_registry.items()
+        }
+
+    def plan(self, *checks: str, exclude=None) -> ChecksPlan:
+        methods = self.get_check_methods(*checks, exclude=exclude)
+        routes = {route for method in methods for route in method.routes or []}
+        return ChecksPlan(
+            routes=sorted(routes),
+            routed=[method for method in methods if method.routes is not None],
+            unrouted=[method for method in methods if method.routes is None]
         )
-        for method in checks:
-            checks_info.update({
-                method[0]: method[1].headers
-            })
-        return checks_info
 
-    def get(self, *checks: str, exclude=None, retries=1) -> ChecksDict:
-        if exclude is None:
-            exclude = []
+    def get(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+            check_timeout=None) -> ChecksDict:
+        """ Collects results of the checks
 
-        check_results = {}
-        check_runners = self.__get_check_runners(*checks,
-                                                 exclude=exclude,
-                                                 retries=retries)
+        timeout is the overall deadline, check_timeout overrides deadlines of the checks,
+        which start once the checks start on a worker. Checks that miss their deadline
+        are UNKNOWN
+        """
+        return {
+            header: status
+            for _, header, status in self.iter_results(*checks, exclude=exclude,
+                                                       retries=retries, delay=delay,
+                                                       timeout=timeout,
+                                                       check_timeout=check_timeout)
+        }
 
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [
-                executor.submit(runner)
-                for runner in check_runners
-            ]
-            for future in as_completed(futures):
-                result = future.result()
-                check_results.update(result)
+    def iter_results(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+                     check_timeout=None) -> Iterator[CheckResult]:
+        """ Yields (node, header, status) as soon as each check is finished """
+        plan = self.plan(*checks, exclude=exclude)
+        executor = ThreadPoolExecutor(max_workers=plan.concurrency)
+        try:
+            futures = self.submit(executor, *checks, exclude=exclude, retries=retries,
+                                  delay=delay, check_timeout=check_timeout)
+            for _, result in collect_results(futures, timeout=timeout):
+                for header, status in result.items():
+                    yield self.node_key, header, status
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, executor: Executor, *checks: str, exclude=None, retries=1,
+               delay=0, check_timeout=None) -> Dict[Future, Func]:
+        """ Schedules checks on the external executor, returns future of each check
+
+        Routes of the checks are requested once, checks with routes are evaluated
+        as soon as all routes are fetched. Retries wait with jittered exponential
+        backoff outside of the executor. Deadline of each check starts when its run
+        or the prefetch of its routes starts on a worker, so checks queued behind
+        other nodes are not expired
+        """
+        plan = self.plan(*checks, exclude=exclude)
+        futures = {}
+        for method in plan.unrouted:
+            future = Future()
+            deadline = CheckDeadline({future: method}, check_timeout)
+            self.__submit_unrouted(executor, method, future, retries, delay, 0, deadline.start)
+            futures[future] = method
+        if plan.routed:
+            routed_futures = {method: Future() for method in plan.routed}
+            deadline = CheckDeadline(
+                {future: method for method, future in routed_futures.items()}, check_timeout
+            )
+            self.__submit_routed(executor, routed_futures, retries, delay, 0, deadline.start)
+            futures.update(deadline.futures)
+        return futures
+
+    def prefetch(self, routes, executor: Executor,
+                 on_start: Optional[Callable[[], None]] = None) -> Future:
+        """ Returns future of checks instance that serves prefetched routes,
+        on_start is called once fetching starts on a worker
+        """
+        if on_start is not None:
+            on_start()
+        future = Future()
+        future.set_result(self)
+        return future
+
+    def evaluate(self, method: Func) -> ChecksDict:
+        return method(self)
+
+    def refresh(self, max_age: float) -> None:
+        """ Reloads data the checks were created with if it is older than max_age seconds """
 
-        return check_results
+    def __submit_unrouted(self, executor: Executor, method: Func, future: Future,
+                          retries: int, delay: float, attempt: int,
+                          on_start: Callable[[], None]) -> None:
+        if future.done():
+            return
+        try:
+            check_future = submit(executor, call_started, on_start, run_check, self, method)
+        except RuntimeError as err:
+            set_future_result(future, exception=err)
+            return
+        check_future.add_done_callback(partial(
+            self.__on_unrouted_done, executor, method, future, retries, delay, attempt, on_start
+        ))
 
-    def __get_check_runners(self, *checks: str, exclude=None, retries=1) -> CheckRunners:
+    def __on_unrouted_done(self, executor: Executor, method: Func, future: Future,
+                           retries: int, delay: float, attempt: int,
+                           on_start: Callable[[], None], check_future: Future) -> None:
+        if check_future.cancelled():
+            future.cancel()
+            return
+        if check_future.exception() is not None:
+            set_future_result(future, exception=check_future.exception())
+            return
+        result = check_future.result()
+        if attempt + 1 < retries and CheckStatus.UNKNOWN in result.values():
+            count_retry(method)
+            delayed_calls.call_later(get_backoff(attempt, delay), partial(
+                self.__submit_unrouted, executor, method, future, retries, delay, attempt + 1,
+                on_start
+            ), futures=[future])
+        else:
+            set_future_result(future, result)
+
+    def __submit_routed(self, executor: Executor, routed_futures: Dict[Func, Future],
+                        retries: int, delay: float, attempt: int,
+                        on_start: Callable[[], None]) -> None:
+        routed_futures = {
+            method: future
+            for method, future in routed_futures.items()
+            if not future.done()
+        }
+        if not routed_futures:
+            return
+        routes = sorted({route for method in routed_futures for route in method.routes})
+        try:
+            checker_future = self.prefetch(routes, executor, on_start=on_start)
+        except RuntimeError as err:
+            for future in routed_futures.values():
+                set_future_result(future, exception=err)
+            return
+        checker_future.add_done_callback(partial(
+            self.__run_routed, executor, routed_futures, retries, delay, attempt, on_start
+        ))
+
+    def __run_routed(self, executor: Executor, routed_futures: Dict[Func, Future], retries: int,
+                     delay: float, attempt: int, on_start: Callable[[], None],
+                     checker_future: Future) -> None:
+        if isinstance(checker_future.exception(), CancelledError):
+            for future in routed_futures.values():
+                future.cancel()
+            return
+        if checker_future.exception() is not None:
+            logger.error('Prefetch of %s failed: %r', self.node_key, checker_future.exception())
+            for method, future in routed_futures.items():
+                set_future_result(future, get_unknown_results(method))
+            return
+        checker = checker_future.result()
+        pending = {}
+        for method, future in routed_futures.items():
+            result = run_check(checker, method)
+            if attempt + 1 < retries and CheckStatus.UNKNOWN in result.values():
+                count_retry(method)
+                pending[method] = future
+            else:
+                set_future_result(future, result)
+        if pending:
+            delayed_calls.call_later(get_backoff(attempt, delay), partial(
+                self.__submit_routed, executor, pending, retries, delay, attempt + 1, on_start
+            ), futures=pending.values())
+
+    async def aget(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+                   session=None) -> ChecksDict:
+        """ Runs checks on the event loop, routes of all checks are prefetched concurrently
+
+        Checks without declared routes are executed in the default executor,
+        checks that are not finished before the timeout are UNKNOWN
+        """
+        return {
+            header: status
+            async for _, header, status in self.aiter_results(*checks, exclude=exclude,
+                                                              retries=retries, delay=delay,
+                                                              timeout=timeout, session=session)
+        }
+
+    async def aiter_results(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+                            session=None) -> AsyncIterator[CheckResult]:
+        """ Yields (node, header, status) as soon as each check is finished on the event loop """
+        methods = self.get_check_methods(*checks, exclude=exclude)
+        deadline = inf if timeout is None else monotonic() + timeout
+        for attempt in range(retries):
+            pending = []
+            async for method, result in self.__arun_checks(methods, session, deadline):
+                if attempt + 1 < retries and CheckStatus.UNKNOWN in result.values():
+                    count_retry(method)
+                    pending.append(method)
+                    continue
+                for header, status in result.items():
+                    yield self.node_key, header, status
+            methods = pending
+            if not methods:
+                break
+            backoff = get_backoff(attempt, delay)
+            if monotonic() + backoff >= deadline:
+                for method in methods:
+                    for header, status in get_unknown_results(method).items():
+                        yield self.node_key, header, status
+                break
+            await asyncio.sleep(backoff)
+
+    async def aprefetch(self, routes, session=None) -> 'BaseChecks':
+        """ Returns checks instance that serves prefetched routes """
+        return self
+
+    async def __arun_checks(self, methods: List[Func], session,
+                            deadline: float) -> AsyncIterator[Tuple[Func, ChecksDict]]:
+        """ Yields results of the checks as they complete, UNKNOWN after the deadline """
+        routes = {route for method in methods for route in method.routes or []}
+        unfinished = set(methods)
+        tasks = {}
+        try:
+            checker = await asyncio.wait_for(self.aprefetch(sorted(routes), session=session),
+                                             timeout=get_remaining(deadline))
+            tasks = {
+                asyncio.ensure_future(self.__arun_check(checker, method)): method
+                for method in methods
+            }
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=get_remaining(deadline),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    unfinished.discard(tasks[task])
+                    yield tasks[task], task.result()
+        except asyncio.TimeoutError:
+            pass
+        except Exception as err:
+            logger.error('Prefetch of %s failed: %r', self.node_key, err)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for method in methods:
+            if method in unfinished:
+                yield method, get_unknown_results(method)
+
+    @staticmethod
+    async def __arun_check(checker, method) -> ChecksDict:
+        if method.routes is None:
+            return await asyncio.to_thread(run_check, checker, method)
+        return run_check(checker, method)
+
+    @classmethod
+    def get_check_methods(cls, *checks: str, exclude=None) -> List[Func]:
         if exclude is None:
             exclude = []
 
-        check_runners = []
         if len(checks) == 0:
-            methods = inspect.getmembers(
-                type(self),
-                predicate=lambda m: inspect.isfunction(m) and getattr(m, 'is_check', None)
-            )
-            for method in methods:
-                if method[0] not in exclude:
-                    check_runners.append(partial(method[1], self, retries=retries))
-        else:
-            for check_name in checks:
-                if check_name in exclude:
-                    continue
-                try:
-                    method = self.__getattribute__(check_name)
-                    assert hasattr(method, 'is_check')
-                    check_runners.append(partial(method, retries=retries))
-                except (AttributeError, AssertionError):
-                    raise AttributeError(f'Check {check_name} is not found in WatchdogChecks')
-        return check_runners
+            return [
+                method
+                for name, method in cls.checks_registry.items()
+                if name not in exclude
+            ]
+        check_methods = []
+        for check_name in checks:
+            if check_name in exclude:
+                continue
+            method = cls.checks_registry.get(check_name)
+            if method is None:
+                raise AttributeError(f'Check {check_name} is not found in {cls.__name__}')
+            check_methods.append(method)
+        return check_methods
+
+
+def collect_results(futures: Dict[Future, Func],
+                    timeout=None) -> Iterator[Tuple[Future, ChecksDict]]:
+    """ Yields results of the check futures as they complete
+
+    Futures that miss the overall timeout are cancelled and yield UNKNOWN results,
+    as well as futures cancelled elsewhere
+    """
+    deadline = inf if timeout is None else monotonic() + timeout
+    pending = set(futures)
+    while pending:
+        expired = {future for future in pending if future.cancelled()}
+        if monotonic() >= deadline:
+            expired = pending
+        for future in expired:
+            future.cancel()
+            yield future, get_unknown_results(futures[future])
+        pending -= expired
+        if not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED,
+                             timeout=get_remaining(deadline))
+        for future in done:
+            if future.cancelled():
+                yield future, get_unknown_results(futures[future])
+            elif future.exception() is not None:
+                logger.error('%s failed: %r', futures[future].__name__, future.exception())
+                yield future, get_unknown_results(futures[future])
+            else:
+                yield future, future.result()
+
+
+class CheckDeadline:
+    """ Resolves check futures with UNKNOWN results once the checks run longer than
+    their timeouts, deadlines start on the first call of start
+    """
+
+    def __init__(self, futures: Dict[Future, Func], check_timeout=None):
+        self.futures = futures
+        self.check_timeout = check_timeout
+        self.__started = False
+        self.__lock = threading.Lock()
+
+    def start(self) -> None:
+        with self.__lock:
+            if self.__started:
+                return
+            self.__started = True
+        for future, method in self.futures.items():
+            timeout = get_check_timeout(method, self.check_timeout)
+            if timeout != inf:
+                delayed_calls.call_later(timeout, partial(
+                    set_future_result, future, get_unknown_results(method)
+                ))
+
+
+def run_check(checker: 'BaseChecks', method: Func) -> ChecksDict:
+    """ Evaluates the check, failed check is logged and its results are UNKNOWN """
+    try:
+        return checker.evaluate(method)
+    except Exception:
+        logger.exception('Check %s of %s failed', method.__name__, checker.node_key)
+        return get_unknown_results(method)
+
+
+def get_remaining(deadline: float) -> Optional[float]:
+    return None if deadline == inf else max(deadline - monotonic(), 0)
+
+
+def get_check_timeout(method: Func, check_timeout: Optional[float] = None) -> float:
+    timeout = check_timeout if check_timeout is not None else method.timeout
+    return inf if timeout is None else timeout
+
+
+def count_retry(method: Func) -> None:
+    metrics = get_metrics()
+    if metrics.enabled:
+        metrics.increment(CHECK_RETRIES, check=method.__name__)
+
+
+def get_unknown_results(method: Func) -> ChecksDict:
+    return dict.fromkeys(method.headers, CheckStatus.UNKNOWN)
@@ -0,0 +1,310 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional,
+                    Tuple)
+
+from skale_checks.adapters.chain import ChainSnapshot
+from skale_checks.adapters.logs import ElasticLogs
+from skale_checks.checks.base import collect_results
+from skale_checks.checks.node import NodeChecks
+from skale_checks.checks.types import CheckResult, FleetChecksDict, NodeKey
+from skale_checks.checks.watchdog import WatchdogChecks
+
+if TYPE_CHECKING:
+    from skale_checks.checks.results import FleetResults
+
+FLEET_MAX_WORKERS = 64
+PROCESS_START_METHOD = 'spawn'
+_worker_skale = None
+HEADERS_ORDER = {
+    header: position
+    for position, header in enumerate(
+        header for headers in NodeChecks.info().values() for header in headers
+    )
+}
+
+
+@dataclass
+class ChecksGroup:
+    """ Checks evaluated once on node_checks and reported for each of the nodes """
+    nodes: Tuple[NodeKey, ...]
+    node_checks: WatchdogChecks
+    checks: Tuple[str, ...]
+    exclude: Optional[List[str]] = None
+
+
+class FleetChecks:
+    """ Runs checks for many nodes on one shared thread pool
+
+    Nodes could be passed as ids (NodeChecks, skale instance is required)
+    or as ips (WatchdogChecks). With processes nodes are sharded across worker
+    processes, each of them creates skale instance with skale_factory
+    """
+
+    def __init__(self, nodes, skale=None, network='mainnet', es_credentials=None, timeout=None,
+                 logs_timeout=None, requirements_path=None, connect_timeout=None,
+                 max_workers=FLEET_MAX_WORKERS, incremental=False, processes=None,
+                 skale_factory: Optional[Callable[[], Any]] = None):
+        self.nodes = list(nodes)
+        self.skale = skale
+        self.processes = processes
+        self.skale_factory = skale_factory
+        self.__process_executor = None
+        self.network = network
+        self.es_credentials = es_credentials
+        self.timeout = timeout
+        self.logs_timeout = logs_timeout
+        self.requirements_path = requirements_path
+        self.connect_timeout = connect_timeout
+        self.max_workers = max_workers
+        self.incremental = incremental
+        self.evaluated = {}
+        self.validators = {}
+
+    def get(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+            check_timeout=None) -> FleetChecksDict:
+        """ Collects checks of all nodes, timeout is the deadline of the whole sweep """
+        fleet_results = {node: {} for node in self.nodes}
+        for node, header, status in self.iter_results(*checks, exclude=exclude, retries=retries,
+                                                      delay=delay, timeout=timeout,
+                                                      check_timeout=check_timeout):
+            fleet_results[node][header] = status
+        return {
+            node: dict(sorted(results.items(), key=get_header_position))
+            for node, results in fleet_results.items()
+        }
+
+    def get_results(self, *checks: str, **kwargs) -> 'FleetResults':
+        """ Collects checks of all nodes to the compact matrix, accepts arguments of get """
+        from skale_checks.checks.results import FleetResults
+        return FleetResults.from_checks(self.get(*checks, **kwargs), validators=self.validators)
+
+    def iter_results(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+                     check_timeout=None) -> Iterator[CheckResult]:
+        """ Yields (node, header, status) of all nodes as soon as each check is finished
+
+        In multi-process mode results of each shard are yielded once the shard is finished
+        """
+        get_kwargs = {'exclude': exclude, 'retries': retries, 'delay': delay,
+                      'timeout': timeout, 'check_timeout': check_timeout}
+        if self.processes and self.processes > 1:
+            yield from self.__iter_shards_results(checks, get_kwargs)
+            return
+        chain = ChainSnapshot(self.skale) if self.skale else None
+        fleet_checks = self.create_checks(chain=chain,
+                                          checks=get_check_names(checks, exclude))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures, future_nodes = {}, {}
+            for group in self.group_checks(fleet_checks, checks, exclude):
+                group_futures = group.node_checks.submit(executor, *group.checks,
+                                                         exclude=group.exclude,
+                                                         retries=retries, delay=delay,
+                                                         check_timeout=check_timeout)
+                futures.update(group_futures)
+                future_nodes.update(dict.fromkeys(group_futures, group.nodes))
+            for future, result in collect_results(futures, timeout=timeout):
+                for node in future_nodes.pop(future):
+                    for header, status in result.items():
+                        yield node, header, status
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aiter_results(self, *checks: str, exclude=None, retries=1, delay=0, timeout=None,
+                            session=None) -> AsyncIterator[CheckResult]:
+        """ Async variant of iter_results, checks of all nodes run on the event loop """
+        if session is None:
+            import aiohttp
+            async with aiohttp.ClientSession() as session:
+                async for result in self.aiter_results(*checks, exclude=exclude,
+                                                       retries=retries, delay=delay,
+                                                       timeout=timeout, session=session):
+                    yield result
+            return
+        chain = ChainSnapshot(self.skale) if self.skale else None
+        fleet_checks = await asyncio.to_thread(self.create_checks, chain,
+                                               get_check_names(checks, exclude))
+        queue = asyncio.Queue()
+
+        async def run_group_checks(group):
+            async for _, header, status in group.node_checks.aiter_results(
+                *group.checks, exclude=group.exclude, retries=retries, delay=delay,
+                timeout=timeout, session=session
+            ):
+                for node in group.nodes:
+                    queue.put_nowait((node, header, status))
+
+        tasks = []
+        for group in self.group_checks(fleet_checks, checks, exclude):
+            task = asyncio.ensure_future(run_group_checks(group))
+            task.add_done_callback(queue.put_nowait)
+            tasks.append(task)
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if isinstance(item, asyncio.Future):
+                    item.result()
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def __iter_shards_results(self, checks, get_kwargs: dict) -> Iterator[CheckResult]:
+        if self.skale_factory is None and any(isinstance(node, int) for node in self.nodes):
+            raise ValueError('skale_factory is required to check nodes by id in processes')
+        fleet_kwargs = {
+            'network': self.network, 'es_credentials': self.es_credentials,
+            'timeout': self.timeout, 'logs_timeout': self.logs_timeout,
+            'requirements_path': self.requirements_path,
+            'connect_timeout': self.connect_timeout, 'max_workers': self.max_workers,
+            'incremental': self.incremental
+        }
+        futures = [
+            self.get_process_executor().submit(
+                run_shard, shard, fleet_kwargs, checks, get_kwargs,
+                {node: self.evaluated[node] for node in shard if node in self.evaluated}
+            )
+            for shard in get_shards(self.nodes, self.processes)
+        ]
+        try:
+            for future in as_completed(futures):
+                fleet_results, validators, evaluated = future.result()
+                self.validators.update(validators)
+                self.evaluated.update(evaluated)
+                for node, results in fleet_results.items():
+                    for header, status in results.items():
+                        yield node, header, status
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def group_checks(self, fleet_checks: Dict[NodeKey, WatchdogChecks], checks,
+                     exclude=None) -> List['ChecksGroup']:
+        """ Splits the sweep into groups of checks, results of each group are
+        reported for all nodes of the group
+        """
+        return [
+            ChecksGroup(nodes=(node,), node_checks=node_checks, checks=checks, exclude=exclude)
+            for node, node_checks in fleet_checks.items()
+        ]
+
+    def get_process_executor(self) -> ProcessPoolExecutor:
+        """ Returns worker processes reused by all sweeps until the checks are closed """
+        if self.__process_executor is None:
+            self.__process_executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+                initializer=init_worker,
+                initargs=(self.skale_factory,)
+            )
+        return self.__process_executor
+
+    def close(self) -> None:
+        if self.__process_executor is not None:
+            self.__process_executor.shutdown(cancel_futures=True)
+            self.__process_executor = None
+
+    def __enter__(self) -> 'FleetChecks':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def create_checks(self, chain=None, checks=None) -> Dict[NodeKey, WatchdogChecks]:
+        """ Creates node checks for node ids in batches and watchdog checks for node ips
+
+        All checks share the chain snapshot of the sweep, only data used by the checks
+        (names of the checks that will be run, all by default) is prefetched. Results
+        of incremental checks are kept between sweeps
+        """
+        fleet_checks = {}
+        node_ids = list(dict.fromkeys(node for node in self.nodes if isinstance(node, int)))
+        if node_ids:
+            if self.skale is None:
+                raise ValueError('skale instance is required to check nodes by id')
+            nodes_checks = NodeChecks.from_ids(
+                self.skale, node_ids, chain=chain, logs_backend=self.create_logs_backend(),
+                checks=checks,
+                network=self.network, es_credentials=self.es_credentials, timeout=self.timeout,
+                logs_timeout=self.logs_timeout, requirements_path=self.requirements_path,
+                connect_timeout=self.connect_timeout, incremental=self.incremental
+            )
+            fleet_checks.update(zip(node_ids, nodes_checks))
+            self.validators.update(
+                (node_id, node_checks.node['validator_id'])
+                for node_id, node_checks in zip(node_ids, nodes_checks)
+            )
+        web3 = self.skale.web3 if self.skale else None
+        for node in self.nodes:
+            if not isinstance(node, int):
+                fleet_checks[node] = WatchdogChecks(node, network=self.network, web3=web3,
+                                                    timeout=self.timeout,
+                                                    requirements_path=self.requirements_path,
+                                                    connect_timeout=self.connect_timeout,
+                                                    chain=chain, incremental=self.incremental)
+        for node, node_checks in fleet_checks.items():
+            node_checks.evaluated = self.evaluated.setdefault(node, {})
+        return fleet_checks
+
+    def create_logs_backend(self) -> Optional[ElasticLogs]:
+        if not self.es_credentials or len(self.es_credentials) != 3:
+            return None
+        return ElasticLogs(self.es_credentials, timeout=self.logs_timeout)
+
+
+def get_check_names(checks, exclude=None) -> List[str]:
+    return [method.__name__ for method in NodeChecks.get_check_methods(*checks, exclude=exclude)]
+
+
+def get_shards(nodes: List[NodeKey], shards_number: int) -> List[List[NodeKey]]:
+    """ Distributes unique nodes across shards round-robin """
+    nodes = list(dict.fromkeys(nodes))
+    shards = [nodes[i::shards_number] for i in range(shards_number)]
+    return [shard for shard in shards if shard]
+
+
+def get_header_position(item) -> int:
+    return HEADERS_ORDER.get(item[0], len(HEADERS_ORDER))
+
+
+def init_worker(skale_factory: Optional[Callable[[], Any]]) -> None:
+    """ Creates skale instance shared by all shards of the worker process """
+    global _worker_skale
+    _worker_skale = skale_factory() if skale_factory is not None else None
+
+
+def run_shard(nodes: List[NodeKey], fleet_kwargs: dict, checks, get_kwargs: dict,
+              evaluated: dict) -> Tuple[FleetChecksDict, Dict[NodeKey, int], dict]:
+    """ Runs checks of the shard in the worker process
+
+    Returns results, validators of the nodes and results of incremental checks,
+    which are passed back to the next sweep of the shard
+    """
+    fleet_checks = FleetChecks(nodes, skale=_worker_skale, **fleet_kwargs)
+    fleet_checks.evaluated = evaluated
+    results = fleet_checks.get(*checks, **get_kwargs)
+    return results, fleet_checks.validators, fleet_checks.evaluated
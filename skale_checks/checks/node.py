@@ -17,123 +17,173 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import threading
 import warnings
+from time import monotonic
+from typing import List
 
-from elasticsearch import Elasticsearch, ElasticsearchException
-from eth_utils import to_wei
-from skale.contracts.manager.nodes import NodeStatus
-from skale.dataclasses.skaled_ports import SkaledPorts
-from skale.schain_config import PORTS_PER_SCHAIN
-from skale.utils.helper import ip_from_bytes
-from skale.utils.web3_utils import public_key_to_address
-from web3 import Web3
-
+from skale_checks.adapters.chain import batch_call, get_active_nodes_count, get_node_address
+from skale_checks.adapters.logs import ElasticLogs
+from skale_checks.adapters.watchdog import Watchdog
 from skale_checks.checks.base import check
-from skale_checks.checks.types import OptionalBool
-from skale_checks.checks.utils import get_active_nodes_count, is_port_open
+from skale_checks.checks.types import NodeKey, OptionalBool, PortStatus, PortTarget
+from skale_checks.checks.utils import scan_ports
 from skale_checks.checks.watchdog import WatchdogChecks
 
 warnings.filterwarnings("ignore")
 
 
 MAX_SCHAINS_PER_NODE = 8
+INTERNAL_PORTS = ['PROPOSAL', 'CATCHUP', 'BINARY_CONSENSUS', 'ZMQ_BROADCAST']
 
 
 class NodeChecks(WatchdogChecks):
     def __init__(self, skale, node_id, network='mainnet', es_credentials=None, timeout=None,
-                 logs_timeout=None, requirements_path=None):
+                 logs_timeout=None, requirements_path=None, connect_timeout=None, node=None,
+                 chain=None, logs_backend=None, incremental=False):
         self.skale = skale
-        self.node = self.skale.nodes.get(node_id)
-        self.node['id'] = node_id
-        self.node['ip'] = ip_from_bytes(self.node['ip'])
+        self.node = parse_node(node_id, node if node else self.skale.nodes.get(node_id))
+        self.loaded_at = monotonic()
+        self.__refresh_lock = threading.Lock()
         self.es_credentials = es_credentials
         self.logs_timeout = logs_timeout
+        if logs_backend is None and es_credentials and len(es_credentials) == 3:
+            logs_backend = ElasticLogs(es_credentials, timeout=logs_timeout)
+        self.logs_backend = logs_backend
         super().__init__(self.node['ip'], network=network, domain_name=self.node['domain_name'],
-                         web3=self.skale.web3, timeout=timeout, requirements_path=requirements_path)
+                         web3=self.skale.web3, timeout=timeout, requirements_path=requirements_path,
+                         connect_timeout=connect_timeout, chain=chain, incremental=incremental)
+
+    @classmethod
+    def from_ids(cls, skale, node_ids, chain=None, logs_backend=None, checks=None,
+                 **kwargs) -> List['NodeChecks']:
+        """ Creates checks for many nodes from node records fetched in batches
+
+        Balances and logs gaps of the nodes used by the checks (names of the checks
+        that will be run, all by default) are prefetched to the chain snapshot and
+        logs backend if they are passed
+        """
+        node_ids = list(node_ids)
+        nodes = get_nodes(skale, node_ids)
+        if checks is None:
+            checks = cls.checks_registry
+        if chain is not None and ('node_balance' in checks or 'validator_balance' in checks):
+            chain.load(nodes, node_balances='node_balance' in checks,
+                       validator_balances='validator_balance' in checks)
+        if logs_backend is not None and 'logs' in checks:
+            logs_backend.load(node_ids)
+        return [
+            cls(skale, node_id, node=node, chain=chain, logs_backend=logs_backend, **kwargs)
+            for node_id, node in zip(node_ids, nodes)
+        ]
+
+    @property
+    def node_key(self) -> NodeKey:
+        return self.node['id']
+
+    def refresh(self, max_age: float) -> None:
+        """ Reloads the node record, watchdog is recreated if ip of the node is changed """
+        with self.__refresh_lock:
+            if monotonic() - self.loaded_at < max_age:
+                return
+            node = parse_node(self.node['id'], get_nodes(self.skale, [self.node['id']])[0])
+            if node['ip'] != self.node_ip:
+                self.node_ip = node['ip']
+                self.watchdog = Watchdog(node['ip'], timeout=self.watchdog.timeout,
+                                         connect_timeout=self.watchdog.connect_timeout)
+            self.domain_name = node['domain_name']
+            self.node = node
+            self.loaded_at = monotonic()
 
     @check(['status'])
     def status(self) -> bool:
+        from skale.contracts.manager.nodes import NodeStatus
         return self.node['status'] == NodeStatus.ACTIVE.value
 
     @check(['node_balance'])
     def node_balance(self) -> bool:
-        address = public_key_to_address(self.node['publicKey'])
-        node_balance = self.skale.web3.eth.get_balance(Web3.to_checksum_address(address))
-        required_node_balance = to_wei(self.requirements['single_node_balance'], 'ether')
+        from eth_utils import to_wei
+        address = get_node_address(self.node)
+        if self.chain is not None:
+            node_balance = self.chain.get_balance(address)
+        else:
+            node_balance = self.skale.web3.eth.get_balance(address)
+        required_node_balance = to_wei(self.requirements.single_node_balance, 'ether')
         return required_node_balance <= node_balance
 
     @check(['val_balance'])
     def validator_balance(self) -> bool:
-        active_nodes_count = get_active_nodes_count(self.skale, self.node['validator_id'])
-        validator_node_balance_wei = to_wei(self.requirements['validator_node_balance'], 'ether')
+        from eth_utils import to_wei
+        if self.chain is not None:
+            active_nodes_count = self.chain.get_active_nodes_count(self.node['validator_id'])
+        else:
+            active_nodes_count = get_active_nodes_count(self.skale, self.node['validator_id'])
+        validator_node_balance_wei = to_wei(self.requirements.validator_node_balance, 'ether')
         required_validator_balance = active_nodes_count * validator_node_balance_wei
 
-        validator_balance = self.skale.wallets.get_validator_balance(self.node['validator_id'])
+        if self.chain is not None:
+            validator_balance = self.chain.get_validator_balance(self.node['validator_id'])
+        else:
+            validator_balance = self.skale.wallets.get_validator_balance(self.node['validator_id'])
         return validator_balance >= required_validator_balance
 
-    @check(['internal_ports'])
+    @check(['internal_ports'], interval=3600, cost=8)
     def internal_ports(self) -> bool:
         """ Checks that internal ports are not accessible from the host """
-        for offset_group in range(MAX_SCHAINS_PER_NODE):
-            for offset_endpoint in [
-                SkaledPorts.PROPOSAL.value,
-                SkaledPorts.CATCHUP.value,
-                SkaledPorts.BINARY_CONSENSUS.value,
-                SkaledPorts.ZMQ_BROADCAST.value
-            ]:
-                port_check_passed = True
-                try:
-                    port_check_passed = not is_port_open(
-                        self.node['ip'],
-                        self.node['port'] + PORTS_PER_SCHAIN * offset_group + offset_endpoint
-                    )
-                except OSError:
-                    port_check_passed = False
-                if not port_check_passed:
-                    return False
-        return True
-
-    @check(['logs'])
+        targets = get_internal_ports(self.node['ip'], self.node['port'])
+        try:
+            port_statuses = scan_ports(targets)
+        except OSError:
+            return False
+        return all(port_statuses[target] == PortStatus.FILTERED for target in targets)
+
+    @check(['logs'], interval=600, cost=4)
     def logs(self) -> OptionalBool:
-        es_args = {}
+        if self.logs_backend is None:
+            return None
+        from elasticsearch import ElasticsearchException
         try:
-            if not self.es_credentials or len(self.es_credentials) != 3:
-                return None
-            if self.logs_timeout:
-                es_args = {
-                    'timeout': self.logs_timeout,
-                    'max_retries': 3,
-                    'retry_on_timeout': True
-                }
-            es = Elasticsearch(self.es_credentials[0],
-                               http_auth=self.es_credentials[1:3],
-                               **es_args)
-            query = {
-                'size': 1,
-                'sort': {
-                    '@timestamp': 'desc'
-                },
-                'query': {
-                    'match': {
-                        'fields.id': self.node['id']
-                    }
-                },
-            }
-            result = es.search(body=query)
-            if result['hits']['total']['value'] == 0:
-                return False
-            time_query = {
-                "size": 1,
-                "script_fields": {
-                    "now": {
-                        "script": "new Date().getTime()"
-                    }
-                }
-            }
-            time_response = es.search(body=time_query)
-            current_time = time_response['hits']['hits'][0]['fields']['now'][0]
-            last_timestamp = result['hits']['hits'][0]['sort'][0]
-            delta_time = (current_time - last_timestamp) / 1000
-            return delta_time < self.requirements['logs_gap']
+            logs_gap = self.logs_backend.get_logs_gap(self.node['id'])
         except (ConnectionError, ElasticsearchException):
             return False
+        if logs_gap is None:
+            return False
+        return logs_gap < self.requirements.logs_gap
+
+
+def parse_node(node_id: int, node: dict) -> dict:
+    from skale.utils.helper import ip_from_bytes
+    node = dict(node)
+    node['id'] = node_id
+    node['ip'] = ip_from_bytes(node['ip'])
+    return node
+
+
+def get_internal_ports(ip, base_port) -> List[PortTarget]:
+    from skale.dataclasses.skaled_ports import SkaledPorts
+    from skale.schain_config import PORTS_PER_SCHAIN
+    return [
+        (ip, base_port + PORTS_PER_SCHAIN * offset_group + SkaledPorts[port].value)
+        for offset_group in range(MAX_SCHAINS_PER_NODE)
+        for port in INTERNAL_PORTS
+    ]
+
+
+def get_nodes(skale, node_ids) -> List[dict]:
+    """ Fetches the same node records as skale.nodes.get with batched contract calls """
+    from skale.contracts.manager.nodes import FIELDS as NODE_FIELDS
+    functions = skale.nodes.contract.functions
+    calls = []
+    for node_id in node_ids:
+        calls.extend([
+            functions.nodes(node_id),
+            functions.getNodePublicKey(node_id),
+            functions.getNodeDomainName(node_id)
+        ])
+    results = batch_call(skale.web3, calls)
+    nodes = []
+    for i in range(0, len(results), 3):
+        raw_node, raw_key, domain_name = results[i:i + 3]
+        public_key = skale.web3.to_hex(raw_key[0] + raw_key[1])
+        nodes.append(dict(zip(NODE_FIELDS, [*raw_node, public_key, domain_name])))
+    return nodes
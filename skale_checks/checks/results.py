@@ -0,0 +1,126 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from skale_checks.checks.types import ChecksDict, CheckStatus, FleetChecksDict, NodeKey
+
+MISSING_STATUS = 255
+NO_VALIDATOR = -1
+
+
+class FleetResults:
+    """ Checks results of the fleet as dense nodes x headers matrix of CheckStatus values
+
+    Headers that were not checked for the node are stored as MISSING_STATUS
+    """
+
+    def __init__(self, nodes: Sequence[NodeKey], headers: Sequence[str], statuses: np.ndarray,
+                 validators: Optional[np.ndarray] = None):
+        self.nodes = list(nodes)
+        self.headers = list(headers)
+        self.statuses = np.asarray(statuses, dtype=np.uint8)
+        if validators is None:
+            validators = np.full(len(self.nodes), NO_VALIDATOR)
+        self.validators = np.asarray(validators, dtype=np.int64)
+        self.node_index = {node: index for index, node in enumerate(self.nodes)}
+        self.header_index = {header: index for index, header in enumerate(self.headers)}
+
+    @classmethod
+    def from_checks(cls, fleet_results: FleetChecksDict, headers: Optional[Sequence[str]] = None,
+                    validators: Optional[Mapping[NodeKey, int]] = None) -> 'FleetResults':
+        """ Builds matrix from results of FleetChecks.get, headers are taken from the results
+        by default
+        """
+        nodes = list(fleet_results)
+        if headers is None:
+            headers = list(dict.fromkeys(
+                header for results in fleet_results.values() for header in results
+            ))
+        header_index = {header: index for index, header in enumerate(headers)}
+        statuses = np.full((len(nodes), len(headers)), MISSING_STATUS, dtype=np.uint8)
+        for row, results in enumerate(fleet_results.values()):
+            for header, status in results.items():
+                if header in header_index:
+                    statuses[row, header_index[header]] = status.value
+        node_validators = None
+        if validators is not None:
+            node_validators = [validators.get(node, NO_VALIDATOR) for node in nodes]
+        return cls(nodes, headers, statuses, validators=node_validators)
+
+    def to_checks(self) -> FleetChecksDict:
+        statuses = list(CheckStatus)
+        return {
+            node: {
+                header: statuses[value]
+                for header, value in zip(self.headers, row.tolist())
+                if value != MISSING_STATUS
+            }
+            for node, row in zip(self.nodes, self.statuses)
+        }
+
+    def get(self, node: NodeKey) -> ChecksDict:
+        row = self.statuses[self.node_index[node]].tolist()
+        return {
+            header: CheckStatus(value)
+            for header, value in zip(self.headers, row)
+            if value != MISSING_STATUS
+        }
+
+    def count(self, status: CheckStatus = CheckStatus.FAILED) -> Dict[str, int]:
+        """ Number of nodes with the status for each header """
+        counts = (self.statuses == status.value).sum(axis=0)
+        return dict(zip(self.headers, counts.tolist()))
+
+    def pass_rates(self) -> Dict[str, float]:
+        """ Share of passed checks among nodes with known result for each header """
+        passed = (self.statuses == CheckStatus.PASSED.value).sum(axis=0)
+        known = passed + (self.statuses == CheckStatus.FAILED.value).sum(axis=0)
+        rates = np.divide(passed, known, out=np.full(len(self.headers), np.nan),
+                          where=known > 0)
+        return dict(zip(self.headers, rates.tolist()))
+
+    def failing_nodes(self, *headers: str) -> List[NodeKey]:
+        """ Nodes that failed any of the headers, any header by default """
+        columns = self.__get_columns(headers)
+        failed = (self.statuses[:, columns] == CheckStatus.FAILED.value).any(axis=1)
+        return [self.nodes[index] for index in np.flatnonzero(failed).tolist()]
+
+    def group_count(self, groups: Sequence[Hashable],
+                    status: CheckStatus = CheckStatus.FAILED) -> Dict[Hashable, Dict[str, int]]:
+        """ Number of nodes with the status for each header in each group of nodes,
+        groups are labels of the nodes, e.g. validator ids or versions
+        """
+        labels, inverse = np.unique(np.asarray(groups), return_inverse=True)
+        counts = np.zeros((len(labels), len(self.headers)), dtype=np.int64)
+        np.add.at(counts, inverse.ravel(), self.statuses == status.value)
+        return {
+            label: dict(zip(self.headers, row))
+            for label, row in zip(labels.tolist(), counts.tolist())
+        }
+
+    def by_validator(self, status: CheckStatus = CheckStatus.FAILED) -> Dict[int, Dict[str, int]]:
+        return self.group_count(self.validators, status=status)
+
+    def __get_columns(self, headers: Sequence[str]) -> List[int]:
+        if not headers:
+            return list(range(len(self.headers)))
+        return [self.header_index[header] for header in headers]
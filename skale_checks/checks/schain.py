@@ -0,0 +1,151 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from skale_checks.adapters.connectors import Response
+from skale_checks.adapters.watchdog import AsyncWatchdog, Watchdog, WATCHDOG_TIMEOUT_DEFAULT
+from skale_checks.checks.node import get_nodes
+from skale_checks.checks.types import ChecksDict, CheckStatus, FleetChecksDict, NodeKey
+
+SCHAIN_HEADER = 'schain'
+
+
+class SchainChecks:
+    """ Checks the schain on every node of its group
+
+    Statuses of the schain are fetched from watchdogs of all nodes concurrently,
+    results contain 'schain' (whether the node runs the schain) and healthchecks
+    of the schain reported by the node
+    """
+
+    def __init__(self, skale, schain_name, timeout=None, connect_timeout=None,
+                 nodes: Optional[Dict[NodeKey, str]] = None):
+        self.skale = skale
+        self.schain_name = schain_name
+        self.timeout = timeout or WATCHDOG_TIMEOUT_DEFAULT
+        self.connect_timeout = connect_timeout
+        self.nodes = nodes
+
+    def get_nodes(self) -> Dict[NodeKey, str]:
+        """ Returns ip of each node of the schain group, resolved once """
+        if self.nodes is None:
+            from skale.utils.helper import ip_from_bytes
+            node_ids = self.skale.schains_internal.get_node_ids_for_schain(self.schain_name)
+            self.nodes = {
+                node_id: ip_from_bytes(node['ip'])
+                for node_id, node in zip(node_ids, get_nodes(self.skale, node_ids))
+            }
+        return self.nodes
+
+    def get(self, timeout=None) -> FleetChecksDict:
+        """ Collects results of the schain on each node, nodes that are not checked
+        before the timeout are UNKNOWN
+        """
+        nodes = self.get_nodes()
+        if not nodes:
+            return {}
+        executor = ThreadPoolExecutor(max_workers=len(nodes))
+        try:
+            futures = {
+                executor.submit(self.__get_node_results, ip): node_id
+                for node_id, ip in nodes.items()
+            }
+            wait(futures, timeout=timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        results = {
+            futures[future]: future.result() if future.done() and not future.cancelled()
+            else get_unknown_schain_results()
+            for future in futures
+        }
+        return {node_id: results[node_id] for node_id in nodes}
+
+    async def aget(self, timeout=None, session=None) -> FleetChecksDict:
+        nodes = await asyncio.to_thread(self.get_nodes)
+        if session is None:
+            import aiohttp
+            async with aiohttp.ClientSession() as session:
+                return await self.aget(timeout=timeout, session=session)
+        tasks = [
+            asyncio.ensure_future(self.__aget_node_results(ip, session))
+            for ip in nodes.values()
+        ]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        results = {}
+        for node_id, task in zip(nodes, tasks):
+            if task.done():
+                results[node_id] = task.result()
+            else:
+                task.cancel()
+                results[node_id] = get_unknown_schain_results()
+        return results
+
+    def get_summary(self, timeout=None) -> ChecksDict:
+        return summarize_results(self.get(timeout=timeout))
+
+    def __get_node_results(self, ip: str) -> ChecksDict:
+        watchdog = Watchdog(ip, timeout=self.timeout, connect_timeout=self.connect_timeout)
+        return get_schain_results(watchdog.get_schain_statuses(), self.schain_name)
+
+    async def __aget_node_results(self, ip: str, session) -> ChecksDict:
+        watchdog = AsyncWatchdog(ip, timeout=self.timeout, connect_timeout=self.connect_timeout,
+                                 session=session)
+        return get_schain_results(await watchdog.get_schain_statuses(), self.schain_name)
+
+
+def get_schain_results(schains_statuses: Response, schain_name: str) -> ChecksDict:
+    if not schains_statuses.is_status_ok():
+        return get_unknown_schain_results()
+    schain = schains_statuses.payload.get(schain_name)
+    if schain is None:
+        return {SCHAIN_HEADER: CheckStatus.FAILED}
+    results = {SCHAIN_HEADER: CheckStatus.PASSED}
+    for name, status in (schain.get('healthchecks') or {}).items():
+        results[name] = CheckStatus.UNKNOWN if status is None else CheckStatus(bool(status))
+    return results
+
+
+def get_unknown_schain_results() -> ChecksDict:
+    return {SCHAIN_HEADER: CheckStatus.UNKNOWN}
+
+
+def summarize_results(nodes_results: FleetChecksDict) -> ChecksDict:
+    """ Combines results of all nodes: check is failed if it failed on any node, passed if it
+    passed on every node and unknown otherwise
+    """
+    headers = list(dict.fromkeys(
+        header for results in nodes_results.values() for header in results
+    ))
+    summary = {}
+    for header in headers:
+        statuses = {results.get(header, CheckStatus.UNKNOWN) for results in nodes_results.values()}
+        summary[header] = get_summary_status(statuses)
+    return summary
+
+
+def get_summary_status(statuses) -> CheckStatus:
+    if CheckStatus.FAILED in statuses:
+        return CheckStatus.FAILED
+    if CheckStatus.UNKNOWN in statuses:
+        return CheckStatus.UNKNOWN
+    return CheckStatus.PASSED
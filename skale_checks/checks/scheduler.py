@@ -0,0 +1,235 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from time import monotonic, time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from skale_checks.checks.base import BaseChecks, collect_results
+from skale_checks.checks.fleet import (FleetChecks, FLEET_MAX_WORKERS, get_check_names,
+                                       get_header_position)
+from skale_checks.checks.types import CheckResult, FleetChecksDict, Func, NodeKey
+from skale_checks.checks.utils import gather_futures
+from skale_checks.metrics import submit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 300
+CHECK_JITTER = 0.1
+CHECKS_WARMUP = 60
+NODES_REFRESH_INTERVAL = 60
+
+
+@dataclass
+class ScheduledCheck:
+    """ Check of one node that is run every interval seconds """
+    node: NodeKey
+    node_checks: BaseChecks
+    method: Func
+    interval: float
+    cost: float
+
+
+class ChecksScheduler:
+    """ Continuously runs checks of many nodes, each check with its own interval
+
+    First runs of each check are spread evenly across the nodes over the warmup period
+    (or the interval if it is shorter), next runs are shifted by jitter. With max_cost_rate
+    checks are started at no more than the given cost per second, so load on watchdogs
+    and backends stays flat
+    """
+
+    def __init__(self, fleet_checks: Dict[NodeKey, BaseChecks], intervals=None,
+                 jitter=CHECK_JITTER, warmup=CHECKS_WARMUP, max_workers=FLEET_MAX_WORKERS,
+                 max_cost_rate=None, retries=1, delay=0, check_timeout=None, exclude=None,
+                 refresh_interval=NODES_REFRESH_INTERVAL,
+                 on_result: Optional[Callable[[CheckResult], None]] = None):
+        self.intervals = intervals or {}
+        self.jitter = jitter
+        self.warmup = warmup
+        self.max_workers = max_workers
+        self.max_cost_rate = max_cost_rate
+        self.retries = retries
+        self.delay = delay
+        self.check_timeout = check_timeout
+        self.refresh_interval = refresh_interval
+        self.on_result = on_result
+        self.scheduled = get_scheduled_checks(fleet_checks, self.intervals, exclude=exclude)
+        self.results: FleetChecksDict = {node: {} for node in fleet_checks}
+        self.checked_at: Dict[NodeKey, Dict[str, float]] = {node: {} for node in fleet_checks}
+        self.__queue = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__next_start = 0.0
+        self.__stopped = True
+        self.__thread = None
+        self.__executor = None
+
+    @classmethod
+    def from_fleet(cls, fleet: FleetChecks, **kwargs) -> 'ChecksScheduler':
+        """ Creates scheduler for nodes of the fleet checks
+
+        Chain data is read on each run, node records and logs gaps are reloaded
+        once they are older than refresh_interval and LOGS_GAPS_TTL seconds
+        """
+        return cls(fleet.create_checks(checks=get_check_names((), kwargs.get('exclude'))),
+                   **kwargs)
+
+    @property
+    def load(self) -> float:
+        """ Average cost of the checks started per second """
+        return sum(scheduled.cost / scheduled.interval for scheduled in self.scheduled)
+
+    def start(self) -> None:
+        with self.__condition:
+            if not self.__stopped:
+                return
+            self.__stopped = False
+            self.__queue.clear()
+            now = monotonic()
+            for scheduled, phase in get_phases(self.scheduled):
+                self.__push(now + phase * min(scheduled.interval, self.warmup), scheduled)
+            self.__next_start = now
+            self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
+
+    def stop(self, wait=True) -> None:
+        with self.__condition:
+            if self.__stopped:
+                return
+            self.__stopped = True
+            self.__condition.notify()
+        self.__thread.join()
+        self.__executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self) -> 'ChecksScheduler':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get(self) -> FleetChecksDict:
+        """ Returns the latest results of all checks of each node """
+        with self.__condition:
+            return {
+                node: dict(sorted(results.items(), key=get_header_position))
+                for node, results in self.results.items()
+            }
+
+    def __push(self, run_at: float, scheduled: ScheduledCheck) -> None:
+        heapq.heappush(self.__queue, (run_at, next(self.__counter), scheduled))
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                if self.__stopped:
+                    return
+                if not self.__queue:
+                    self.__condition.wait()
+                    continue
+                run_at, _, scheduled = self.__queue[0]
+                now = monotonic()
+                if self.max_cost_rate:
+                    run_at = max(run_at, self.__next_start)
+                if run_at > now:
+                    self.__condition.wait(run_at - now)
+                    continue
+                heapq.heappop(self.__queue)
+                if self.max_cost_rate:
+                    self.__next_start = max(self.__next_start, now) + \
+                        scheduled.cost / self.max_cost_rate
+            submit(self.__executor, self.__run_check, scheduled)
+
+    def __run_check(self, scheduled: ScheduledCheck) -> None:
+        """ Submits the check to the shared executor, results are collected once it is finished
+        or its deadline is missed
+        """
+        try:
+            scheduled.node_checks.refresh(self.refresh_interval)
+        except Exception:
+            logger.exception('Refresh of %s failed', scheduled.node)
+        try:
+            futures = scheduled.node_checks.submit(self.__executor, scheduled.method.__name__,
+                                                   retries=self.retries, delay=self.delay,
+                                                   check_timeout=self.check_timeout)
+        except RuntimeError:
+            return
+        gather_futures(list(futures)).add_done_callback(
+            lambda _: self.__finish_check(scheduled, futures)
+        )
+
+    def __finish_check(self, scheduled: ScheduledCheck, futures: Dict[Future, Func]) -> None:
+        """ Updates the latest results and schedules the next run of the check,
+        results of runs interrupted by stop are dropped
+        """
+        if self.__stopped:
+            return
+        results = {}
+        for _, result in collect_results(futures):
+            results.update(result)
+        checked_at = time()
+        with self.__condition:
+            self.results[scheduled.node].update(results)
+            self.checked_at[scheduled.node].update(dict.fromkeys(results, checked_at))
+            if not self.__stopped:
+                self.__push(monotonic() + self.get_delay(scheduled.interval), scheduled)
+                self.__condition.notify()
+        if self.on_result is not None:
+            for header, status in results.items():
+                self.on_result((scheduled.node, header, status))
+
+    def get_delay(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+def get_scheduled_checks(fleet_checks: Dict[NodeKey, BaseChecks], intervals: Dict[str, float],
+                         exclude=None) -> List[ScheduledCheck]:
+    """ Intervals override default intervals of the checks by check name """
+    exclude = exclude or []
+    return [
+        ScheduledCheck(
+            node=node,
+            node_checks=node_checks,
+            method=method,
+            interval=intervals.get(name, method.interval or DEFAULT_CHECK_INTERVAL),
+            cost=method.cost
+        )
+        for node, node_checks in fleet_checks.items()
+        for name, method in node_checks.checks_registry.items()
+        if name not in exclude
+    ]
+
+
+def get_phases(scheduled_checks: List[ScheduledCheck]) -> Iterator[Tuple[ScheduledCheck, float]]:
+    """ Spreads first runs of each check evenly across the nodes, phase is a share of the period """
+    by_check = {}
+    for scheduled in scheduled_checks:
+        by_check.setdefault(scheduled.method.__name__, []).append(scheduled)
+    for checks in by_check.values():
+        offset = random.random()
+        for i, scheduled in enumerate(checks):
+            yield scheduled, (offset + i / len(checks)) % 1
@@ -17,9 +17,11 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from dataclasses import dataclass
 from enum import Enum
 from functools import partial
-from typing import TypeVar, Callable, Any, Union, Tuple, Dict, List
+from types import MappingProxyType
+from typing import TypeVar, Callable, Any, Union, Tuple, Dict, List, FrozenSet, Mapping, Optional
 
 
 class CheckStatus(Enum):
@@ -28,8 +30,60 @@ class CheckStatus(Enum):
     UNKNOWN = 2
 
 
+class PortStatus(Enum):
+    OPEN = 'open'
+    CLOSED = 'closed'
+    FILTERED = 'filtered'
+
+
+@dataclass(frozen=True)
+class Requirements:
+    """ Network requirements with version whitelists compiled to frozensets """
+    blocks_gap: Optional[int]
+    logs_gap: Optional[float]
+    single_node_balance: Optional[float]
+    validator_node_balance: Optional[float]
+    call_speed: Optional[float]
+    ssl_gap_days: Optional[int]
+    versions: Mapping[str, FrozenSet[str]]
+    hardware: Mapping[str, float]
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def __reduce__(self):
+        """ Read-only mappings are not picklable, they are passed to processes as dicts """
+        fields = dict(self.__dict__, versions=dict(self.versions), hardware=dict(self.hardware))
+        return self.from_fields, (fields,)
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> 'Requirements':
+        return cls(**dict(fields, versions=MappingProxyType(dict(fields['versions'])),
+                          hardware=MappingProxyType(dict(fields['hardware']))))
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> 'Requirements':
+        return cls(
+            blocks_gap=raw.get('blocks_gap'),
+            logs_gap=raw.get('logs_gap'),
+            single_node_balance=raw.get('single_node_balance'),
+            validator_node_balance=raw.get('validator_node_balance'),
+            call_speed=raw.get('call_speed'),
+            ssl_gap_days=raw.get('ssl_gap_days'),
+            versions=MappingProxyType({
+                name: frozenset(versions)
+                for name, versions in (raw.get('versions') or {}).items()
+            }),
+            hardware=MappingProxyType(dict(raw.get('hardware') or {}))
+        )
+
+
 Func = TypeVar('Func', bound=Callable[..., Any])
 OptionalBool = Union[bool, None]
 OptionalBoolTuple = Tuple[OptionalBool, ...]
 ChecksDict = Dict[str, CheckStatus]
+PortTarget = Tuple[str, int]
+NodeKey = Union[int, str]
+FleetChecksDict = Dict[NodeKey, ChecksDict]
+CheckResult = Tuple[Optional[NodeKey], str, CheckStatus]
 CheckRunners = List[Union[partial, Func]]
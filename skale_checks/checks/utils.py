@@ -17,55 +17,223 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import errno
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import selectors
 import socket
-from importlib import reload
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from concurrent.futures import Future, InvalidStateError
+from functools import lru_cache
+from time import monotonic
+from typing import IO, Any, AsyncIterable, Callable, Dict, Iterable, List, Optional
 
 import yaml
-from telnetlib import Telnet
-from web3._utils import request
 
+from skale_checks.adapters.chain import get_active_nodes_count, is_node_active  # noqa: F401
 from skale_checks.checks import DEFAULT_REQUIREMENTS_PATH
+from skale_checks.checks.types import CheckResult, PortStatus, PortTarget, Requirements
 
+logger = logging.getLogger(__name__)
 
-TELNET_TIMEOUT = 3
+PORT_SCAN_TIMEOUT = 3
+PORT_SCAN_MAX_SOCKETS = 512
+CONNECT_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+MAX_BACKOFF = 30
 
 
-def get_requirements(network='mainnet', requirements_path=None):
+class DelayedCalls:
+    """ Runs delayed calls from one daemon thread, so waiting does not occupy pool workers """
+
+    def __init__(self):
+        self.__calls = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def call_later(self, delay: float, func: Callable[[], Any],
+                   futures: Iterable[Future] = ()) -> None:
+        """ Schedules the call, futures that depend on it are resolved with its exception """
+        with self.__condition:
+            heapq.heappush(self.__calls, (monotonic() + delay, next(self.__counter), func,
+                                          list(futures)))
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+            self.__condition.notify()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                while not self.__calls:
+                    self.__condition.wait()
+                call_time, _, func, futures = self.__calls[0]
+                if call_time > monotonic():
+                    self.__condition.wait(call_time - monotonic())
+                    continue
+                heapq.heappop(self.__calls)
+            try:
+                func()
+            except Exception as exc:
+                logger.exception('Delayed call failed')
+                for future in futures:
+                    set_future_result(future, exception=exc)
+
+
+delayed_calls = DelayedCalls()
+
+
+def get_requirements(network='mainnet', requirements_path=None) -> Requirements:
+    """ Returns requirements shared by all checks until the file is modified """
     if requirements_path is None:
         requirements_path = DEFAULT_REQUIREMENTS_PATH
+    requirements_path = os.path.realpath(requirements_path)
+    return load_requirements(requirements_path, network, os.path.getmtime(requirements_path))
+
+
+@lru_cache(maxsize=32)
+def load_requirements(requirements_path, network, mtime) -> Requirements:
     with open(requirements_path, 'r') as stream:
         try:
             all_requirements = yaml.safe_load(stream)
-            return all_requirements[network]
+            return Requirements.from_dict(all_requirements[network])
         except yaml.YAMLError as exc:
             print(exc)
 
 
-def is_node_active(skale, node_id):
-    reload(request)
-    return skale.nodes.is_node_active(node_id)
+def is_port_open(ip: str, port: int) -> bool:
+    """ Port is treated as open if the host responds on it, even with refusal """
+    return scan_ports([(ip, port)])[(ip, port)] != PortStatus.FILTERED
 
 
-def get_active_nodes_count(skale, validator_id):
-    sum = 0
-    validator_node_ids = skale.nodes.get_validator_node_indices(validator_id)
-    with ThreadPoolExecutor(max_workers=len(validator_node_ids)) as executor:
-        executors_list = [
-            executor.submit(is_node_active, skale, id)
-            for id in validator_node_ids
-        ]
-    for executor in executors_list:
-        sum += executor.result()
-    return sum
+def scan_ports(targets: Iterable[PortTarget], timeout=PORT_SCAN_TIMEOUT, deadline=None,
+               max_sockets=PORT_SCAN_MAX_SOCKETS) -> Dict[PortTarget, PortStatus]:
+    """ Concurrently probes (ip, port) targets of one or many nodes with non-blocking connects
 
+    Each probe waits up to timeout seconds, targets that are not probed before the overall
+    deadline (in seconds) are missing from the results
+    """
+    pending = list(reversed(dict.fromkeys(targets)))
+    scan_deadline = None if deadline is None else monotonic() + deadline
+    results = {}
+    selector = selectors.DefaultSelector()
+    try:
+        while pending or selector.get_map():
+            now = monotonic()
+            if scan_deadline is not None and now >= scan_deadline:
+                break
+            while pending and len(selector.get_map()) < max_sockets:
+                target = pending.pop()
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                err = sock.connect_ex(target)
+                if err in CONNECT_IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE, (target, now + timeout))
+                else:
+                    results[target] = get_port_status(err)
+                    sock.close()
+            if not selector.get_map():
+                continue
+            wait_until = min(key.data[1] for key in selector.get_map().values())
+            if scan_deadline is not None:
+                wait_until = min(wait_until, scan_deadline)
+            for key, _ in selector.select(max(wait_until - monotonic(), 0)):
+                target, _ = key.data
+                results[target] = get_port_status(
+                    key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                )
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+            now = monotonic()
+            for key in list(selector.get_map().values()):
+                target, expires_at = key.data
+                if expires_at <= now:
+                    results[target] = PortStatus.FILTERED
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+    return results
 
-def is_port_open(ip: str, port: int) -> bool:
+
+def get_port_status(err: int) -> PortStatus:
+    """ Any connection error except for timeout means that the host answered on the port """
+    if err == 0:
+        return PortStatus.OPEN
+    return PortStatus.CLOSED
+
+
+def gather_futures(futures: List[Future], func: Callable[[list], Any] = list) -> Future:
+    """ Returns future that resolves to func of all results once every future is done """
+    gathered = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        try:
+            gathered.set_result(func([future.result() for future in futures]))
+        except Exception as err:
+            gathered.set_exception(err)
+
+    if not futures:
+        on_done(None)
+    for future in futures:
+        future.add_done_callback(on_done)
+    return gathered
+
+
+def call_started(on_start: Optional[Callable[[], None]], func: Callable, *args) -> Any:
+    """ Calls on_start once func is started on a worker, then func """
+    if on_start is not None:
+        on_start()
+    return func(*args)
+
+
+def get_backoff(attempt: int, delay: float) -> float:
+    """ Exponential backoff with full jitter, attempt starts from 0 """
+    return random.uniform(0, min(delay * 2 ** attempt, MAX_BACKOFF))
+
+
+def set_future_result(future: Future, result=None, exception=None) -> None:
+    """ Resolves the future unless it was already cancelled by a deadline """
     try:
-        with Telnet(ip, port, timeout=TELNET_TIMEOUT):
-            pass
-    except socket.timeout:
-        return False
-    except ConnectionRefusedError:
-        return True
-    return True
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+def write_ndjson(results: Iterable[CheckResult], stream: IO[str]) -> int:
+    """ Writes results as they come, one JSON object per line, returns number of lines """
+    count = 0
+    for result in results:
+        stream.write(format_ndjson(result))
+        stream.flush()
+        count += 1
+    return count
+
+
+async def awrite_ndjson(results: AsyncIterable[CheckResult], stream: IO[str]) -> int:
+    count = 0
+    async for result in results:
+        stream.write(format_ndjson(result))
+        stream.flush()
+        count += 1
+    return count
+
+
+def format_ndjson(result: CheckResult) -> str:
+    node, header, status = result
+    return json.dumps({'node': node, 'check': header, 'status': status.name}) + '\n'
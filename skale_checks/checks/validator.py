@@ -0,0 +1,74 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import Dict, List
+
+from skale_checks.adapters.chain import batch_call
+from skale_checks.checks.fleet import ChecksGroup, FleetChecks, FLEET_MAX_WORKERS
+from skale_checks.checks.types import NodeKey
+from skale_checks.checks.watchdog import WatchdogChecks
+
+VALIDATOR_CHECKS = ['validator_balance', 'validator_nodes']
+
+
+class ValidatorChecks(FleetChecks):
+    """ Runs checks for all nodes of the validator
+
+    Checks of the validator (balance and validator nodes) are evaluated once on one
+    of its active nodes and reported for every node, other checks run for each node
+    """
+
+    def __init__(self, skale, validator_id, node_ids=None, network='mainnet',
+                 es_credentials=None, timeout=None, logs_timeout=None, requirements_path=None,
+                 connect_timeout=None, max_workers=FLEET_MAX_WORKERS, incremental=False):
+        self.validator_id = validator_id
+        if node_ids is None:
+            node_ids = get_validator_node_ids(skale, validator_id)
+        super().__init__(node_ids, skale=skale, network=network, es_credentials=es_credentials,
+                         timeout=timeout, logs_timeout=logs_timeout,
+                         requirements_path=requirements_path, connect_timeout=connect_timeout,
+                         max_workers=max_workers, incremental=incremental)
+
+    def group_checks(self, fleet_checks: Dict[NodeKey, WatchdogChecks], checks,
+                     exclude=None) -> List[ChecksGroup]:
+        exclude = list(exclude or [])
+        validator_checks = [
+            name for name in VALIDATOR_CHECKS
+            if name not in exclude and (not checks or name in checks)
+        ]
+        groups = super().group_checks(fleet_checks, checks, exclude + VALIDATOR_CHECKS)
+        if validator_checks and fleet_checks:
+            groups.insert(0, ChecksGroup(nodes=tuple(fleet_checks),
+                                         node_checks=get_validator_node(fleet_checks),
+                                         checks=tuple(validator_checks)))
+        return groups
+
+
+def get_validator_node_ids(skale, validator_id: int) -> List[int]:
+    functions = skale.nodes.contract.functions
+    return list(batch_call(skale.web3, [functions.getValidatorNodeIndexes(validator_id)])[0])
+
+
+def get_validator_node(fleet_checks: Dict[NodeKey, WatchdogChecks]) -> WatchdogChecks:
+    """ Returns checks of the first active node, the first node if none of them is active """
+    from skale.contracts.manager.nodes import NodeStatus
+    for node_checks in fleet_checks.values():
+        if node_checks.node['status'] == NodeStatus.ACTIVE.value:
+            return node_checks
+    return next(iter(fleet_checks.values()))
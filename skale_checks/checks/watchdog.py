@@ -17,13 +17,25 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import logging
 import re
+from concurrent.futures import Executor, Future
+from copy import copy
 from datetime import datetime
 import datetime as dt
+from functools import partial
+from typing import Callable, Optional
 
-from skale_checks.adapters.watchdog import Watchdog
+from skale_checks.adapters.watchdog import (AsyncWatchdog, Watchdog, WatchdogSnapshot,
+                                            WATCHDOG_ROUTES)
 from skale_checks.checks.base import check, BaseChecks
-from skale_checks.checks.types import OptionalBool, OptionalBoolTuple
+from skale_checks.checks.types import (ChecksDict, CheckStatus, NodeKey, OptionalBool,
+                                       OptionalBoolTuple)
+from skale_checks.checks.utils import call_started, gather_futures
+from skale_checks.metrics import submit
+
+logger = logging.getLogger(__name__)
 
 CONTAINER_RUNNING_STATUS = 'running'
 SGX_CONNECTED_STATUS = 'CONNECTED'
@@ -31,17 +43,89 @@ SGX_CONNECTED_STATUS = 'CONNECTED'
 
 class WatchdogChecks(BaseChecks):
     def __init__(self, node_ip, network='mainnet', domain_name=None,
-                 web3=None, timeout=None, requirements_path=None):
+                 web3=None, timeout=None, requirements_path=None, connect_timeout=None,
+                 chain=None, incremental=False):
         self.node_ip = node_ip
         if timeout:
-            self.watchdog = Watchdog(node_ip, timeout=timeout)
+            self.watchdog = Watchdog(node_ip, timeout=timeout, connect_timeout=connect_timeout)
         else:
-            self.watchdog = Watchdog(node_ip)
+            self.watchdog = Watchdog(node_ip, connect_timeout=connect_timeout)
         self.domain_name = domain_name
         self.web3 = web3
+        self.chain = chain
+        self.block_number = None
+        self.incremental = incremental
+        self.evaluated = {}
         super().__init__(network, requirements_path=requirements_path)
 
-    @check(['core'])
+    @property
+    def node_key(self) -> NodeKey:
+        return self.node_ip
+
+    def prefetch(self, routes, executor: Executor,
+                 on_start: Optional[Callable[[], None]] = None) -> Future:
+        futures = [
+            submit(executor, call_started, on_start, getattr(self.watchdog, route))
+            for route in routes
+        ]
+        if self.web3 and 'endpoint_status' in routes:
+            futures.append(submit(executor, call_started, on_start,
+                                  self.prefetch_block_number))
+        return gather_futures(futures, partial(self.__create_snapshot, routes))
+
+    async def aprefetch(self, routes, session=None) -> 'WatchdogChecks':
+        if session is None:
+            import aiohttp
+            async with aiohttp.ClientSession() as session:
+                return await self.aprefetch(routes, session=session)
+        watchdog = AsyncWatchdog(self.node_ip, timeout=self.watchdog.timeout,
+                                 connect_timeout=self.watchdog.connect_timeout, session=session)
+        fetches = [getattr(watchdog, route)() for route in routes]
+        if self.web3 and 'endpoint_status' in routes:
+            fetches.append(asyncio.to_thread(self.prefetch_block_number))
+        return self.__create_snapshot(routes, await asyncio.gather(*fetches))
+
+    def __create_snapshot(self, routes, results) -> 'WatchdogChecks':
+        """ Returns copy of the checks serving fetched responses, block number goes last """
+        checks_snapshot = copy(self)
+        responses = {WATCHDOG_ROUTES[route]: result for route, result in zip(routes, results)}
+        checks_snapshot.watchdog = WatchdogSnapshot(self.node_ip, responses,
+                                                    timeout=self.watchdog.timeout)
+        if len(results) > len(routes):
+            checks_snapshot.block_number = results[-1]
+        return checks_snapshot
+
+    def evaluate(self, method) -> ChecksDict:
+        """ In incremental mode reuses results of the check while its routes payloads
+        and requirements are not changed
+        """
+        if not self.incremental or method.routes is None or method.volatile:
+            return method(self)
+        fingerprints = tuple(self.watchdog.get_route_fingerprint(route) for route in method.routes)
+        evaluated = self.evaluated.get(method.__name__)
+        if evaluated is not None and evaluated[:2] == (self.requirements, fingerprints):
+            return dict(evaluated[2])
+        results = method(self)
+        if None not in fingerprints and CheckStatus.UNKNOWN not in results.values():
+            self.evaluated[method.__name__] = (self.requirements, fingerprints, results)
+        return results
+
+    def prefetch_block_number(self) -> Optional[int]:
+        """ Failed read is left to the endpoint check, so it does not fail other checks """
+        try:
+            return self.get_block_number()
+        except Exception as err:
+            logger.warning('Block number prefetch for %s failed: %r', self.node_ip, err)
+            return None
+
+    def get_block_number(self) -> int:
+        if self.block_number is not None:
+            return self.block_number
+        if self.chain is not None:
+            return self.chain.block_number
+        return self.web3.eth.block_number
+
+    @check(['core'], routes=['core_status'])
     def core(self) -> OptionalBool:
         components = self.watchdog.get_skale_containers()
         if not components.is_status_ok():
@@ -49,28 +133,31 @@ class WatchdogChecks(BaseChecks):
         components = components.payload
         container_statuses = True
         for name in components:
-            if name in self.requirements['versions'].keys():
+            if name in self.requirements.versions:
                 if components[name]['status'] != CONTAINER_RUNNING_STATUS:
                     container_statuses = False
         return container_statuses
 
-    @check(['endpoint', 'trusted_endpoint', 'endpoint_speed'])
+    @check(['endpoint', 'trusted_endpoint', 'endpoint_speed'], routes=['endpoint_status'],
+           volatile=True, interval=30)
     def endpoint(self) -> OptionalBoolTuple:
         endpoint_response = self.watchdog.endpoint_status()
         if not endpoint_response.is_status_ok():
             return None, None, None
         endpoint_data = endpoint_response.payload
         if self.web3:
-            current_block = self.web3.eth.block_number
+            current_block = self.get_block_number()
             blocks_gap = current_block - endpoint_data['block_number']
-            endpoint_status = blocks_gap <= self.requirements['blocks_gap']
+            endpoint_status = blocks_gap <= self.requirements.blocks_gap
         else:
             endpoint_status = None
         trusted_endpoint = endpoint_data['trusted']
-        endpoint_speed = endpoint_data['call_speed'] <= self.requirements['call_speed']
+        endpoint_speed = endpoint_data['call_speed'] <= self.requirements.call_speed
         return endpoint_status, trusted_endpoint, endpoint_speed
 
-    @check(['versions'])
+    @check(['versions'],
+           routes=['core_status', 'schain_containers_versions_status', 'meta_status'],
+           interval=3600, cost=3)
     def versions(self) -> OptionalBool:
         components_response = self.watchdog.get_component_versions()
         if not components_response.is_status_ok():
@@ -78,12 +165,12 @@ class WatchdogChecks(BaseChecks):
         components = components_response.payload
         component_versions = True
         for name in components:
-            if name in self.requirements['versions'].keys():
-                if components[name] not in self.requirements['versions'][name]:
+            if name in self.requirements.versions:
+                if components[name] not in self.requirements.versions[name]:
                     component_versions = False
         return component_versions
 
-    @check(['sgx', 'sgx_version'])
+    @check(['sgx', 'sgx_version'], routes=['sgx_status'])
     def sgx(self) -> OptionalBoolTuple:
         sgx_response = self.watchdog.sgx_status()
         if not sgx_response.is_status_ok():
@@ -97,36 +184,36 @@ class WatchdogChecks(BaseChecks):
             is_sgx_working = status_zmg == 0 and status_https == SGX_CONNECTED_STATUS
         else:
             is_sgx_working = status_zmg is True and status_https is True
-        sgx_version_check = sgx_data['sgx_wallet_version'] in self.requirements['versions']['sgx']
+        sgx_version_check = sgx_data['sgx_wallet_version'] in self.requirements.versions['sgx']
         return is_sgx_working, sgx_version_check
 
-    @check(['hardware'])
+    @check(['hardware'], routes=['hardware_status'], interval=3600)
     def hardware(self) -> OptionalBool:
         hardware_response = self.watchdog.hardware_status()
         if not hardware_response.is_status_ok():
             return None
         hardware_data = hardware_response.payload
         hardware_check = True
-        for key in self.requirements['hardware'].keys():
-            if hardware_data[key] < self.requirements['hardware'][key]:
+        for key, minimum in self.requirements.hardware.items():
+            if hardware_data[key] < minimum:
                 hardware_check = False
         return hardware_check
 
-    @check(['btrfs'])
+    @check(['btrfs'], routes=['btrfs_status'])
     def btrfs(self) -> OptionalBool:
         btrfs_response = self.watchdog.btrfs_status()
         if not btrfs_response.is_status_ok():
             return None
         return btrfs_response.payload['kernel_module']
 
-    @check(['public_ip'])
+    @check(['public_ip'], routes=['public_ip'])
     def public_ip(self) -> OptionalBool:
         public_ip_response = self.watchdog.public_ip()
         if not public_ip_response.is_status_ok():
             return None
         return public_ip_response.payload['public_ip'] == self.node_ip
 
-    @check(['validator_nodes'])
+    @check(['validator_nodes'], routes=['validator_nodes'])
     def validator_nodes(self) -> OptionalBool:
         validator_nodes_response = self.watchdog.validator_nodes()
         if not validator_nodes_response.is_status_ok():
@@ -139,7 +226,7 @@ class WatchdogChecks(BaseChecks):
                 return False
         return True
 
-    @check(['ssl'])
+    @check(['ssl'], routes=['ssl_status'], volatile=True, interval=86400)
     def ssl(self) -> OptionalBool:
         if not self.domain_name:
             return None
@@ -159,7 +246,7 @@ class WatchdogChecks(BaseChecks):
                 return False
             raw_date = ssl_data.get('expiration_date')
             expiration_date = datetime.strptime(raw_date, '%Y-%m-%dT%H:%M:%S')
-            offset = dt.timedelta(days=self.requirements['ssl_gap_days'])
+            offset = dt.timedelta(days=self.requirements.ssl_gap_days)
             min_valid_time = (datetime.now() + offset).timestamp()
             if expiration_date.timestamp() < min_valid_time:
                 return False
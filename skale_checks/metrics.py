@@ -0,0 +1,138 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+from bisect import bisect_left
+from concurrent.futures import Executor, Future
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRICS_PREFIX = 'skale_checks'
+
+REQUEST_DURATION = 'request_duration_seconds'
+CHECK_DURATION = 'check_duration_seconds'
+CHECK_RETRIES = 'check_retries_total'
+QUEUE_WAIT = 'queue_wait_seconds'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsSink:
+    """ Receives timings of requests and checks, the default sink discards them """
+    enabled = False
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        pass
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        pass
+
+
+class PrometheusMetrics(MetricsSink):
+    """ Aggregates observations to histograms and counters in Prometheus text format """
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix=METRICS_PREFIX):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.__histograms: Dict[str, Dict[Labels, list]] = {}
+        self.__counters: Dict[str, Dict[Labels, float]] = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self.__lock:
+            series = self.__histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self.__lock:
+            series = self.__counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def expose(self) -> str:
+        """ Returns all metrics in Prometheus text exposition format """
+        lines = []
+        with self.__lock:
+            for name, series in sorted(self.__histograms.items()):
+                metric = f'{self.prefix}_{name}'
+                lines.append(f'# TYPE {metric} histogram')
+                for labels, (counts, total, count) in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                        cumulative += bucket_count
+                        bucket_labels = format_labels(labels + (('le', str(bound)),))
+                        lines.append(f'{metric}_bucket{bucket_labels} {cumulative}')
+                    lines.append(f'{metric}_sum{format_labels(labels)} {total}')
+                    lines.append(f'{metric}_count{format_labels(labels)} {count}')
+            for name, series in sorted(self.__counters.items()):
+                metric = f'{self.prefix}_{name}'
+                lines.append(f'# TYPE {metric} counter')
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{metric}{format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+
+
+_sink = MetricsSink()
+
+
+def get_metrics() -> MetricsSink:
+    return _sink
+
+
+def set_metrics(sink: Optional[MetricsSink]) -> None:
+    """ Sets global metrics sink, None disables metrics """
+    global _sink
+    _sink = MetricsSink() if sink is None else sink
+
+
+def submit(executor: Executor, func: Callable, *args) -> Future:
+    """ Submits func to the executor, records how long it waited for a free worker """
+    metrics = get_metrics()
+    if not metrics.enabled:
+        return executor.submit(func, *args)
+    submitted_at = perf_counter()
+
+    def timed_func():
+        metrics.observe(QUEUE_WAIT, perf_counter() - submitted_at)
+        return func(*args)
+    return executor.submit(timed_func)
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    formatted = [f'{name}="{escape_label(value)}"' for name, value in labels]
+    return '{' + ','.join(formatted) + '}'
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,146 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from skale_checks.adapters.breaker import CircuitBreaker, CircuitBreakers, Probe
+from skale_checks.adapters.watchdog import WATCHDOG_ROUTES, AsyncWatchdog, Watchdog
+from skale_checks.checks.types import CheckStatus
+from skale_checks.checks.watchdog import WatchdogChecks
+
+
+def test_breaker_probes_cold_host_once():
+    breaker = CircuitBreaker()
+    assert breaker.check_request() is True
+    assert isinstance(breaker.check_request(), Probe)
+    assert not breaker.allow_request(timeout=0.01)
+    breaker.report(True)
+    assert breaker.check_request() is True
+    assert breaker.allow_request()
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    breaker.report(True)
+    breaker.report(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.report(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.15)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.report(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.15)
+    assert breaker.allow_request()
+    breaker.report(True)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_breakers_reset_in_place():
+    breakers = CircuitBreakers(failure_threshold=1)
+    breaker = breakers.get('host')
+    breaker.report(False)
+    assert not breaker.allow_request()
+    breakers.reset('host')
+    assert breakers.get('host') is breaker
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_watchdog_waits_for_probe(watchdogs):
+    server, = watchdogs(latency=0.2)
+    breakers = CircuitBreakers()
+    watchdog = Watchdog(server.server_address[0], cache=None, breakers=breakers)
+    with ThreadPoolExecutor(max_workers=len(WATCHDOG_ROUTES)) as executor:
+        futures = [executor.submit(getattr(watchdog, route)) for route in WATCHDOG_ROUTES]
+        responses = [future.result() for future in futures]
+    assert all(response.is_status_ok() for response in responses)
+    assert breakers.get(watchdog.watchdog_url).reached
+
+
+def test_watchdog_fails_fast_on_unreachable_host(watchdogs):
+    server, = watchdogs(latency=1)
+    breakers = CircuitBreakers()
+    watchdog = Watchdog(server.server_address[0], timeout=0.2, cache=None, breakers=breakers)
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(WATCHDOG_ROUTES)) as executor:
+        futures = [executor.submit(getattr(watchdog, route)) for route in WATCHDOG_ROUTES]
+        responses = [future.result() for future in futures]
+    assert time.monotonic() - started_at < 0.8
+    assert not any(response.is_status_ok() for response in responses)
+    breaker = breakers.get(watchdog.watchdog_url)
+    assert breaker.failures == 1 and not breaker.reached
+
+
+def test_released_probe_lets_waiting_request_probe():
+    breaker = CircuitBreaker()
+    assert breaker.check_request() is True
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        waiting = executor.submit(breaker.allow_request, 1)
+        time.sleep(0.05)
+        breaker.release()
+        assert waiting.result()
+    assert breaker.failures == 0 and breaker.state == CircuitBreaker.CLOSED
+    assert isinstance(breaker.check_request(), Probe)
+
+
+def test_released_half_open_request_is_retried():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.report(False)
+    time.sleep(0.1)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request()
+
+
+def test_cancelled_async_requests_keep_circuit_closed(watchdogs):
+    aiohttp = pytest.importorskip('aiohttp')
+    server, = watchdogs()
+    breakers = CircuitBreakers()
+    checks = WatchdogChecks(server.server_address[0])
+    checks.watchdog = Watchdog(server.server_address[0], breakers=breakers)
+    assert checks.get('core') == {'core': CheckStatus.PASSED}
+    server.profile.latency = 0.5
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            watchdog = AsyncWatchdog(server.server_address[0], session=session,
+                                     breakers=breakers)
+            tasks = [asyncio.ensure_future(getattr(watchdog, route)())
+                     for route in ('hardware_status', 'sgx_status', 'btrfs_status')]
+            await asyncio.sleep(0.1)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    breaker = breakers.get(checks.watchdog.watchdog_url)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    server.profile.latency = 0
+    assert checks.get('btrfs') == {'btrfs': CheckStatus.PASSED}
@@ -0,0 +1,131 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from skale_checks.adapters.cache import AsyncSingleFlight, ResponseCache, SingleFlight
+from skale_checks.adapters.connectors import construct_err_response, construct_ok_response
+from skale_checks.adapters.watchdog import Watchdog
+
+
+def test_cache_expires_entries():
+    cache = ResponseCache()
+    response = construct_ok_response({'a': 1})
+    cache.set('key', response, ttl=0.1)
+    assert cache.get('key') is response
+    time.sleep(0.15)
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_cache_skips_error_responses():
+    cache = ResponseCache()
+    cache.set('key', construct_err_response('failed'), ttl=10)
+    cache.set('other', construct_ok_response(), ttl=0)
+    assert cache.get('key') is None
+    assert cache.get('other') is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(maxsize=2)
+    for key in ('a', 'b'):
+        cache.set(key, construct_ok_response(), ttl=10)
+    cache.get('a')
+    cache.set('c', construct_ok_response(), ttl=10)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+
+def test_cache_invalidates_host():
+    cache = ResponseCache()
+    for key in [('a', '/x'), ('a', '/y'), ('b', '/x')]:
+        cache.set(key, construct_ok_response(), ttl=10)
+    cache.invalidate('a', '/x')
+    assert cache.get(('a', '/x')) is None and cache.get(('a', '/y')) is not None
+    cache.invalidate('a')
+    assert cache.get(('a', '/y')) is None and cache.get(('b', '/x')) is not None
+
+
+def test_watchdog_caches_only_ok_responses(watchdogs):
+    server, = watchdogs()
+    cache = ResponseCache()
+    watchdog = Watchdog(server.server_address[0], cache=cache)
+    first = watchdog.core_status()
+    assert first.is_status_ok()
+    assert watchdog.core_status() is first
+
+    server.profile.error_rate = 1
+    watchdog.invalidate('core_status')
+    assert not watchdog.core_status().is_status_ok()
+    server.profile.error_rate = 0
+    assert watchdog.core_status().is_status_ok()
+
+
+def test_single_flight_shares_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def func():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return len(calls)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(flight.do, 'key', func)
+        started.wait()
+        followers = [executor.submit(flight.do, 'key', func) for _ in range(7)]
+        results = [future.result() for future in [leader, *followers]]
+    assert results == [1] * 8
+    assert flight.do('key', func) == 2
+
+
+def test_single_flight_shares_exception():
+    flight = SingleFlight()
+
+    def func():
+        time.sleep(0.1)
+        raise ValueError('failed')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(flight.do, 'key', func) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_async_single_flight_shares_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def run():
+        return await asyncio.gather(*[flight.do('key', func) for _ in range(5)])
+
+    assert asyncio.run(run()) == [1] * 5
@@ -0,0 +1,32 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import time
+
+from skale_checks.adapters.logs import ElasticLogs
+
+
+def test_logs_gaps_expire(elasticsearch):
+    logs = ElasticLogs(elasticsearch.credentials, ttl=0.2)
+    logs.load([0, 1])
+    elasticsearch.logs_gap = 3600
+    assert round(logs.get_logs_gap(0)) == 10
+    time.sleep(0.25)
+    assert round(logs.get_logs_gap(0)) == 3600
+    assert logs.get_logs_gaps([2])[2] == 3600
@@ -0,0 +1,77 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from skale_checks.adapters.watchdog import AsyncWatchdog, Watchdog
+
+aiohttp = pytest.importorskip('aiohttp')
+
+
+def run_async_watchdog(ip, *calls, **kwargs):
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            watchdog = AsyncWatchdog(ip, session=session, **kwargs)
+            return await asyncio.gather(*[getattr(watchdog, call)() for call in calls])
+    return asyncio.run(run())
+
+
+def test_async_watchdog_routes(watchdogs):
+    server, = watchdogs()
+    ip = server.server_address[0]
+    sgx, hardware, containers = run_async_watchdog(ip, 'sgx_status', 'hardware_status',
+                                                   'get_skale_containers', cache=None)
+    assert sgx.is_status_ok() and sgx.payload['status_zmq']
+    assert hardware.payload['cpu_total_cores'] == 8
+    assert containers.payload['skale_admin']['status'] == 'running'
+
+
+def test_async_watchdog_errors(watchdogs):
+    server, = watchdogs(error_rate=1)
+    ip = server.server_address[0]
+    core, = run_async_watchdog(ip, 'core_status', cache=None)
+    assert not core.is_status_ok()
+    with pytest.raises(AttributeError):
+        run_async_watchdog(ip, 'missing_status')
+
+
+def test_schain_statuses_index(watchdogs):
+    server, = watchdogs(schains=3)
+    watchdog = Watchdog(server.server_address[0])
+    statuses = watchdog.get_schain_statuses()
+    assert list(statuses.payload) == ['schain-0', 'schain-1', 'schain-2']
+    assert watchdog.get_schain_statuses() is statuses
+    assert watchdog.get_schain_status('schain-1').payload['healthchecks']['dkg']
+    assert not watchdog.get_schain_status('missing').is_status_ok()
+
+
+def test_async_schain_status(watchdogs):
+    server, = watchdogs(schains=2)
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            watchdog = AsyncWatchdog(server.server_address[0], session=session)
+            return await asyncio.gather(watchdog.get_schain_status('schain-0'),
+                                        watchdog.get_schain_status('missing'))
+
+    status, missing = asyncio.run(run())
+    assert status.payload['name'] == 'schain-0'
+    assert not missing.is_status_ok()
@@ -0,0 +1,139 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from skale_checks.checks.base import BaseChecks, check
+from skale_checks.checks.types import CheckStatus
+from skale_checks.checks.utils import DelayedCalls
+from skale_checks.checks.watchdog import WatchdogChecks
+
+
+class FakeChecks(BaseChecks):
+    node_key = 'fake'
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = 0
+        super().__init__()
+
+    @check(['flaky'])
+    def flaky(self):
+        self.attempts += 1
+        return None if self.attempts <= self.failures else True
+
+    @check(['slow'], timeout=0.1)
+    def slow(self):
+        time.sleep(0.5)
+        return True
+
+    @check(['broken'])
+    def broken(self):
+        raise ValueError('broken')
+
+
+def test_aget_watchdog_checks(watchdogs):
+    pytest.importorskip('aiohttp')
+    server, = watchdogs()
+    checks = WatchdogChecks(server.server_address[0])
+    assert asyncio.run(checks.aget('core', 'btrfs', 'hardware')) == {
+        'core': CheckStatus.PASSED,
+        'btrfs': CheckStatus.PASSED,
+        'hardware': CheckStatus.PASSED
+    }
+
+
+def test_aget_failed_watchdog_is_unknown(watchdogs):
+    pytest.importorskip('aiohttp')
+    server, = watchdogs(error_rate=1)
+    checks = WatchdogChecks(server.server_address[0])
+    assert asyncio.run(checks.aget('btrfs')) == {'btrfs': CheckStatus.UNKNOWN}
+
+
+def test_aget_retries():
+    checks = FakeChecks(failures=1)
+    results = asyncio.run(checks.aget('flaky', 'broken', retries=2, session=object()))
+    assert results == {'flaky': CheckStatus.PASSED, 'broken': CheckStatus.UNKNOWN}
+    assert checks.attempts == 2
+
+
+def test_aget_timeout():
+    async def run():
+        started_at = time.monotonic()
+        results = await FakeChecks().aget('flaky', 'slow', timeout=0.2, session=object())
+        return results, time.monotonic() - started_at
+
+    results, elapsed = asyncio.run(run())
+    assert elapsed < 0.4
+    assert results == {'flaky': CheckStatus.PASSED, 'slow': CheckStatus.UNKNOWN}
+
+
+def test_check_retries_unknown_results():
+    checks = FakeChecks(failures=2)
+    assert checks.flaky(retries=3) == {'flaky': CheckStatus.PASSED}
+    assert checks.attempts == 3
+
+
+def test_get_retries_until_attempts_run_out():
+    checks = FakeChecks(failures=2)
+    assert checks.get('flaky', retries=2) == {'flaky': CheckStatus.UNKNOWN}
+    assert checks.attempts == 2
+    assert checks.get('flaky', retries=2) == {'flaky': CheckStatus.PASSED}
+
+
+def test_get_marks_missed_deadline_unknown():
+    started_at = time.monotonic()
+    assert FakeChecks().get('slow') == {'slow': CheckStatus.UNKNOWN}
+    assert time.monotonic() - started_at < 0.4
+    assert FakeChecks().get('slow', check_timeout=1) == {'slow': CheckStatus.PASSED}
+
+
+def test_get_marks_overall_timeout_unknown():
+    results = FakeChecks().get('flaky', 'slow', timeout=0.05, check_timeout=1)
+    assert results == {'flaky': CheckStatus.PASSED, 'slow': CheckStatus.UNKNOWN}
+
+
+def test_failed_check_is_unknown():
+    assert FakeChecks().get('broken', 'flaky', retries=2) == {
+        'broken': CheckStatus.UNKNOWN,
+        'flaky': CheckStatus.PASSED
+    }
+
+
+def test_submit_shares_executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = FakeChecks(failures=1).submit(executor, 'flaky', retries=2)
+        assert [future.result(timeout=1) for future in futures] == [
+            {'flaky': CheckStatus.PASSED}
+        ]
+
+
+def test_failed_delayed_call_resolves_futures():
+    future = Future()
+
+    def fail():
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+    DelayedCalls().call_later(0.01, fail, futures=[future])
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
@@ -0,0 +1,132 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import json
+import multiprocessing
+from functools import partial
+
+import pytest
+
+from benchmarks.servers import create_skale
+from skale_checks.checks.fleet import FleetChecks
+from skale_checks.checks.types import CheckStatus
+from skale_checks.checks.watchdog import WatchdogChecks
+
+WATCHDOG_CHECKS = ['core', 'sgx', 'hardware', 'btrfs', 'public_ip']
+
+
+def test_watchdog_fleet(watchdogs):
+    nodes = [server.server_address[0] for server in watchdogs(3)]
+    results = FleetChecks(nodes).get(*WATCHDOG_CHECKS)
+    assert list(results) == nodes
+    for node_results in results.values():
+        assert set(node_results) == {
+            header for name in WATCHDOG_CHECKS for header in WatchdogChecks.info()[name]
+        }
+        assert node_results['core'] == CheckStatus.PASSED
+        assert node_results['public_ip'] == CheckStatus.PASSED
+
+
+def test_failed_node_check_is_isolated(watchdogs):
+    broken, healthy = watchdogs(2)
+    broken.bodies['/status/hardware'] = json.dumps({'data': {}, 'error': None}).encode()
+    nodes = [broken.server_address[0], healthy.server_address[0]]
+    results = FleetChecks(nodes).get('hardware', 'btrfs')
+    assert results[nodes[0]] == {'hardware': CheckStatus.UNKNOWN, 'btrfs': CheckStatus.PASSED}
+    assert results[nodes[1]] == {'hardware': CheckStatus.PASSED, 'btrfs': CheckStatus.PASSED}
+
+
+def test_unreachable_node_is_unknown(watchdogs):
+    server, = watchdogs()
+    node = server.server_address[0]
+    server.shutdown()
+    server.server_close()
+    assert FleetChecks([node], timeout=1).get('core') == {node: {'core': CheckStatus.UNKNOWN}}
+
+
+def test_fleet_by_ids(skale, elasticsearch):
+    fleet = FleetChecks(range(4), skale=skale, es_credentials=elasticsearch.credentials)
+    results = fleet.get('status', 'validator_balance', 'logs', 'core')
+    assert list(results) == [0, 1, 2, 3]
+    for node_results in results.values():
+        assert node_results == {
+            'status': CheckStatus.PASSED,
+            'val_balance': CheckStatus.PASSED,
+            'logs': CheckStatus.PASSED,
+            'core': CheckStatus.PASSED
+        }
+    assert fleet.validators == {0: 0, 1: 1, 2: 2, 3: 3}
+
+
+def test_aiter_results(watchdogs):
+    nodes = [server.server_address[0] for server in watchdogs(2)]
+
+    async def collect():
+        return [result async for result in FleetChecks(nodes).aiter_results('core', 'btrfs')]
+
+    results = asyncio.run(collect())
+    assert sorted(results) == sorted(
+        (node, header, CheckStatus.PASSED) for node in nodes for header in ('core', 'btrfs')
+    )
+
+
+def test_incremental_checks_are_kept(watchdogs):
+    server, = watchdogs()
+    node = server.server_address[0]
+    fleet = FleetChecks([node], incremental=True)
+    first = fleet.get('core')
+    assert fleet.evaluated[node]
+    assert fleet.get('core') == first
+
+
+def test_check_deadline_starts_on_worker(watchdogs):
+    nodes = [server.server_address[0] for server in watchdogs(20, latency=0.1)]
+    fleet = FleetChecks(nodes, max_workers=4)
+    results = fleet.get('btrfs', 'hardware', check_timeout=0.5)
+    assert all(
+        status == CheckStatus.PASSED
+        for node_results in results.values() for status in node_results.values()
+    )
+
+
+@pytest.mark.skipif('spawn' not in multiprocessing.get_all_start_methods(),
+                    reason='worker processes are spawned')
+def test_process_shards(chain, watchdogs):
+    ips = [server.server_address[0] for server in watchdogs(2)]
+    nodes = [3, ips[0], 0, 2, ips[1], 1]
+    checks = ('core', 'btrfs', 'hardware')
+    expected = FleetChecks(nodes, skale=chain.create_skale()).get(*checks)
+    with FleetChecks(nodes, skale=chain.create_skale(), processes=2, incremental=True,
+                     skale_factory=partial(create_skale, chain.endpoint)) as fleet:
+        results = fleet.get(*checks)
+        assert list(results) == nodes
+        assert [list(node_results) for node_results in results.values()] == \
+            [list(node_results) for node_results in expected.values()]
+        assert results == expected
+        assert fleet.validators == {0: 0, 1: 1, 2: 2, 3: 3}
+        assert all(set(fleet.evaluated[node]) == set(checks) for node in nodes)
+        evaluated = {node: dict(fleet.evaluated[node]) for node in nodes}
+        assert fleet.get(*checks) == expected
+        assert {node: dict(fleet.evaluated[node]) for node in nodes} == evaluated
+
+
+def test_process_shards_require_skale_factory(skale):
+    with pytest.raises(ValueError):
+        FleetChecks([0, 1], skale=skale, processes=2).get('status')
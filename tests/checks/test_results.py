@@ -0,0 +1,59 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from skale_checks.checks.types import CheckStatus
+
+np = pytest.importorskip('numpy')
+
+from skale_checks.checks.results import MISSING_STATUS, FleetResults  # noqa: E402
+
+PASSED, FAILED, UNKNOWN = CheckStatus.PASSED, CheckStatus.FAILED, CheckStatus.UNKNOWN
+FLEET_RESULTS = {
+    0: {'core': PASSED, 'sgx': FAILED},
+    1: {'core': FAILED, 'sgx': UNKNOWN, 'btrfs': PASSED},
+    2: {'core': PASSED},
+}
+
+
+def test_round_trip():
+    results = FleetResults.from_checks(FLEET_RESULTS, validators={0: 5, 1: 5, 2: 7})
+    assert results.headers == ['core', 'sgx', 'btrfs']
+    assert results.statuses[2, 1] == MISSING_STATUS
+    assert results.to_checks() == FLEET_RESULTS
+    assert results.get(1) == FLEET_RESULTS[1]
+    assert results.validators.tolist() == [5, 5, 7]
+
+
+def test_aggregations():
+    results = FleetResults.from_checks(FLEET_RESULTS, validators={0: 5, 1: 5, 2: 7})
+    assert results.count() == {'core': 1, 'sgx': 1, 'btrfs': 0}
+    assert results.pass_rates() == {'core': 2 / 3, 'sgx': 0.0, 'btrfs': 1.0}
+    assert results.failing_nodes() == [0, 1]
+    assert results.failing_nodes('sgx') == [0]
+    assert results.by_validator() == {5: {'core': 1, 'sgx': 1, 'btrfs': 0},
+                                      7: {'core': 0, 'sgx': 0, 'btrfs': 0}}
+
+
+def test_fleet_get_results(skale):
+    from skale_checks.checks.fleet import FleetChecks
+    results = FleetChecks([0, 1], skale=skale).get_results('status')
+    assert results.to_checks() == {0: {'status': PASSED}, 1: {'status': PASSED}}
+    assert results.validators.tolist() == [0, 1]
@@ -0,0 +1,76 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+
+import pytest
+
+from skale_checks.checks.schain import SchainChecks
+from skale_checks.checks.types import CheckStatus
+
+PASSED, FAILED, UNKNOWN = CheckStatus.PASSED, CheckStatus.FAILED, CheckStatus.UNKNOWN
+SCHAIN_RESULTS = {'schain': PASSED, 'config': PASSED, 'dkg': PASSED, 'rpc': PASSED}
+
+
+@pytest.fixture
+def schain_nodes(watchdogs):
+    hosting, missing, unreachable = watchdogs(3, schains=2)
+    missing.bodies['/status/schains'] = b'{"data": [], "error": null}'
+    unreachable.shutdown()
+    unreachable.server_close()
+    return {node_id: server.server_address[0]
+            for node_id, server in enumerate([hosting, missing, unreachable])}
+
+
+def test_get(schain_nodes):
+    checks = SchainChecks(None, 'schain-1', timeout=1, nodes=schain_nodes)
+    assert checks.get() == {
+        0: SCHAIN_RESULTS,
+        1: {'schain': FAILED},
+        2: {'schain': UNKNOWN}
+    }
+    assert checks.get_summary() == {
+        'schain': FAILED, 'config': UNKNOWN, 'dkg': UNKNOWN, 'rpc': UNKNOWN
+    }
+
+
+def test_summary_of_healthy_schain(watchdogs):
+    nodes = {node_id: server.server_address[0] for node_id, server in enumerate(watchdogs(2))}
+    assert SchainChecks(None, 'schain-0', nodes=nodes).get_summary() == SCHAIN_RESULTS
+
+
+def test_aget(schain_nodes):
+    pytest.importorskip('aiohttp')
+    checks = SchainChecks(None, 'schain-1', timeout=1, nodes=schain_nodes)
+    assert asyncio.run(checks.aget()) == {
+        0: SCHAIN_RESULTS,
+        1: {'schain': FAILED},
+        2: {'schain': UNKNOWN}
+    }
+
+
+def test_get_timeout(watchdogs):
+    fast, slow = watchdogs(2)
+    slow.profile.latency = 1
+    nodes = {0: fast.server_address[0], 1: slow.server_address[0]}
+    started_at = time.monotonic()
+    results = SchainChecks(None, 'schain-0', nodes=nodes).get(timeout=0.3)
+    assert time.monotonic() - started_at < 0.8
+    assert results == {0: SCHAIN_RESULTS, 1: {'schain': UNKNOWN}}
@@ -0,0 +1,140 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+from skale_checks.checks.fleet import FleetChecks
+from skale_checks.checks.scheduler import ChecksScheduler
+from skale_checks.checks.types import CheckStatus
+from skale_checks.checks.watchdog import WatchdogChecks
+
+
+class ResultsRecorder:
+    def __init__(self):
+        self.results = []
+        self.lock = threading.Lock()
+
+    def __call__(self, result):
+        with self.lock:
+            self.results.append((time.monotonic(), *result))
+
+    def get(self, header=None):
+        with self.lock:
+            return [result for result in self.results if header in (None, result[2])]
+
+
+class RefreshedChecks(WatchdogChecks):
+    def __init__(self, *args, **kwargs):
+        self.refreshes = []
+        super().__init__(*args, **kwargs)
+
+    def refresh(self, max_age: float) -> None:
+        self.refreshes.append(max_age)
+
+
+def get_exclude(*checks):
+    return [name for name in WatchdogChecks.checks_registry if name not in checks]
+
+
+def create_scheduler(nodes, checks, **kwargs):
+    fleet_checks = {node: WatchdogChecks(node, timeout=2) for node in nodes}
+    return ChecksScheduler(fleet_checks, exclude=get_exclude(*checks), warmup=0, **kwargs)
+
+
+def test_checks_are_rescheduled_with_jitter(watchdogs):
+    server, = watchdogs()
+    node = server.server_address[0]
+    recorder = ResultsRecorder()
+    scheduler = create_scheduler([node], ['core', 'btrfs'], intervals={'core': 0.2, 'btrfs': 5},
+                                 jitter=0.5, on_result=recorder)
+    with scheduler:
+        time.sleep(1.1)
+    runs = [result[0] for result in recorder.get('core')]
+    assert 4 <= len(runs) <= 11
+    assert all(0.09 <= later - earlier <= 0.35 for earlier, later in zip(runs, runs[1:]))
+    assert len(recorder.get('btrfs')) == 1
+    assert scheduler.get() == {node: {'core': CheckStatus.PASSED, 'btrfs': CheckStatus.PASSED}}
+    assert set(scheduler.checked_at[node]) == {'core', 'btrfs'}
+    assert all(0.1 <= scheduler.get_delay(0.2) <= 0.3 for _ in range(100))
+
+
+def test_missed_check_timeout_is_unknown_and_rescheduled(watchdogs):
+    server, = watchdogs(latency=0.5)
+    recorder = ResultsRecorder()
+    scheduler = create_scheduler([server.server_address[0]], ['btrfs'],
+                                 intervals={'btrfs': 0.1}, jitter=0, check_timeout=0.1,
+                                 on_result=recorder)
+    with scheduler:
+        time.sleep(0.6)
+    statuses = [result[3] for result in recorder.get('btrfs')]
+    assert len(statuses) >= 2
+    assert statuses[0] == CheckStatus.UNKNOWN
+
+
+def test_max_cost_rate_paces_starts(watchdogs):
+    nodes = [server.server_address[0] for server in watchdogs(5)]
+    recorder = ResultsRecorder()
+    scheduler = create_scheduler(nodes, ['btrfs'], intervals={'btrfs': 10}, max_cost_rate=10,
+                                 on_result=recorder)
+    assert scheduler.load == 0.5
+    with scheduler:
+        time.sleep(0.6)
+    times = sorted(result[0] for result in recorder.get('btrfs'))
+    assert len(times) == 5
+    assert all(later - earlier >= 0.08 for earlier, later in zip(times, times[1:]))
+
+
+def test_checks_are_refreshed(watchdogs):
+    server, = watchdogs()
+    node = server.server_address[0]
+    node_checks = RefreshedChecks(node)
+    scheduler = ChecksScheduler({node: node_checks}, intervals={'core': 0.1},
+                                exclude=get_exclude('core'), warmup=0, refresh_interval=7)
+    with scheduler:
+        time.sleep(0.35)
+    assert len(node_checks.refreshes) >= 2
+    assert set(node_checks.refreshes) == {7}
+
+
+def test_stop_drops_results_in_flight(watchdogs):
+    server, = watchdogs(latency=0.3)
+    node = server.server_address[0]
+    recorder = ResultsRecorder()
+    scheduler = create_scheduler([node], ['btrfs'], on_result=recorder)
+    scheduler.start()
+    time.sleep(0.1)
+    scheduler.stop(wait=False)
+    time.sleep(0.4)
+    assert recorder.get() == []
+    assert scheduler.get() == {node: {}}
+
+
+def test_from_fleet(skale, elasticsearch):
+    fleet = FleetChecks([0, 1], skale=skale, es_credentials=elasticsearch.credentials)
+    recorder = ResultsRecorder()
+    scheduler = ChecksScheduler.from_fleet(fleet, exclude=get_exclude() + ['internal_ports'],
+                                           warmup=0, on_result=recorder)
+    with scheduler:
+        time.sleep(0.5)
+    assert scheduler.get() == {
+        node: {'status': CheckStatus.PASSED, 'node_balance': CheckStatus.PASSED,
+               'val_balance': CheckStatus.PASSED, 'logs': CheckStatus.PASSED}
+        for node in (0, 1)
+    }
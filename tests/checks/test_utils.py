@@ -0,0 +1,89 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import socket
+from concurrent.futures import Future
+
+import pytest
+
+from skale_checks.checks.types import PortStatus
+from skale_checks.checks.utils import (MAX_BACKOFF, gather_futures, get_backoff, is_port_open,
+                                       scan_ports)
+
+
+@pytest.fixture
+def listening_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen()
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_scan_ports(listening_port, closed_port):
+    open_target, closed_target = ('127.0.0.1', listening_port), ('127.0.0.1', closed_port)
+    assert scan_ports([open_target, closed_target, open_target], timeout=1) == {
+        open_target: PortStatus.OPEN,
+        closed_target: PortStatus.CLOSED
+    }
+    assert is_port_open(*closed_target)
+
+
+def test_scan_ports_limits_sockets(watchdogs):
+    targets = [(server.server_address[0], 3009) for server in watchdogs(4)]
+    results = scan_ports(targets, timeout=1, max_sockets=1)
+    assert results == dict.fromkeys(targets, PortStatus.OPEN)
+
+
+def test_scan_ports_skips_targets_after_deadline(listening_port):
+    assert scan_ports([('127.0.0.1', listening_port)], deadline=0) == {}
+
+
+def test_gather_futures():
+    futures = [Future() for _ in range(3)]
+    gathered = gather_futures(futures, sum)
+    for i, future in enumerate(futures):
+        assert not gathered.done()
+        future.set_result(i)
+    assert gathered.result() == 3
+    assert gather_futures([]).result() == []
+
+
+def test_gather_futures_propagates_exception():
+    futures = [Future(), Future()]
+    gathered = gather_futures(futures)
+    futures[0].set_result(1)
+    futures[1].set_exception(ValueError('failed'))
+    with pytest.raises(ValueError):
+        gathered.result()
+
+
+def test_get_backoff():
+    assert get_backoff(0, 0) == 0
+    assert all(0 <= get_backoff(attempt, 1) <= 2 ** attempt for attempt in range(4))
+    assert get_backoff(100, 1) <= MAX_BACKOFF
@@ -0,0 +1,69 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from collections import Counter
+
+from skale_checks.checks import base
+from skale_checks.checks.types import CheckStatus
+from skale_checks.checks.validator import VALIDATOR_CHECKS, ValidatorChecks
+
+
+def count_runs(monkeypatch) -> Counter:
+    runs = Counter()
+    run_check = base.run_check
+
+    def counted_run_check(checker, method):
+        runs[method.__name__] += 1
+        return run_check(checker, method)
+
+    monkeypatch.setattr(base, 'run_check', counted_run_check)
+    return runs
+
+
+def test_validator_checks_run_once(skale, monkeypatch):
+    runs = count_runs(monkeypatch)
+    validator = ValidatorChecks(skale, 1)
+    assert validator.nodes == [1, 5]
+    results = validator.get('validator_balance', 'validator_nodes', 'core')
+    assert results == {
+        node_id: {'val_balance': CheckStatus.PASSED, 'core': CheckStatus.PASSED,
+                  'validator_nodes': CheckStatus.PASSED}
+        for node_id in (1, 5)
+    }
+    assert runs == {'validator_balance': 1, 'validator_nodes': 1, 'core': 2}
+
+
+def test_validator_group(skale):
+    validator = ValidatorChecks(skale, 2)
+    fleet_checks = validator.create_checks()
+    group, *node_groups = validator.group_checks(fleet_checks, ())
+    assert group.nodes == (2, 6) and group.node_checks is fleet_checks[2]
+    assert group.checks == tuple(VALIDATOR_CHECKS)
+    assert [node_group.nodes for node_group in node_groups] == [(2,), (6,)]
+    assert all(set(VALIDATOR_CHECKS) <= set(node_group.exclude) for node_group in node_groups)
+
+
+def test_node_checks_only_have_no_validator_group(skale, monkeypatch):
+    runs = count_runs(monkeypatch)
+    validator = ValidatorChecks(skale, 3)
+    groups = validator.group_checks(validator.create_checks(), ('core',))
+    assert [group.nodes for group in groups] == [(3,), (7,)]
+    assert validator.get('core') == {3: {'core': CheckStatus.PASSED},
+                                     7: {'core': CheckStatus.PASSED}}
+    assert runs == {'core': 2}
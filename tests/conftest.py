@@ -0,0 +1,84 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of skale-checks
+#
+#   Copyright (C) 2021-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import itertools
+
+import pytest
+
+from benchmarks.servers import (FakeChain, FakeElasticsearch, FakeWatchdog, WatchdogProfile,
+                                get_node_ip, serve)
+
+NODES_NUMBER = 8
+
+_node_indexes = itertools.count(NODES_NUMBER)
+
+
+@pytest.fixture
+def watchdogs():
+    """ Starts fake watchdogs on addresses that were not used by other tests, so cached
+    responses, circuits and pooled connections of other tests do not interfere
+    """
+    servers = []
+
+    def start(number=1, **profile):
+        started = [
+            serve(FakeWatchdog(get_node_ip(next(_node_indexes)), WatchdogProfile(**profile)))
+            for _ in range(number)
+        ]
+        servers.extend(started)
+        return started
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope='session')
+def node_watchdogs():
+    """ Watchdogs of the nodes registered on the fake chain, they are shared by all tests """
+    servers = [
+        serve(FakeWatchdog(get_node_ip(node_id), WatchdogProfile()))
+        for node_id in range(NODES_NUMBER)
+    ]
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def chain(node_watchdogs):
+    server = serve(FakeChain(NODES_NUMBER))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def elasticsearch():
+    server = serve(FakeElasticsearch())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def skale(chain):
+    return chain.create_skale()